@@ -4,17 +4,125 @@ Dialog Components
 Settings and front matter dialogs
 """
 
+import re
+import sys
+from functools import lru_cache
 from pathlib import Path
-from PySide6.QtWidgets import *
-from PySide6.QtCore import *
-from PySide6.QtGui import *
-from document_manager import DocumentMetadata
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple
+from PySide6.QtWidgets import (
+    QCheckBox, QComboBox, QDialog, QDialogButtonBox, QFileDialog, QFormLayout,
+    QGridLayout, QGroupBox, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QSpinBox, QTabWidget, QTableView, QTextEdit, QVBoxLayout, QWidget
+)
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSignalBlocker, Qt
+from PySide6.QtGui import QFontDatabase
+
+if TYPE_CHECKING:
+    from document_manager import DocumentMetadata
+
+
+_CSV_SPLIT = re.compile(r'\s*,\s*')
+_DEFAULT_EXPORT_DIR = str(Path.home() / "Documents")
+
+
+def _split_csv(text: str) -> List[str]:
+    """Split a comma-separated field into stripped, non-empty tokens"""
+    text = text.strip()
+    if not text:
+        return []
+    return [sys.intern(token) for token in _CSV_SPLIT.split(text) if token]
+
+
+@lru_cache(maxsize=1)
+def _font_families() -> Tuple[str, ...]:
+    """Installed font families, enumerated once per process"""
+    return tuple(QFontDatabase.families())
+
+
+class CustomFieldsModel(QAbstractTableModel):
+    """Table model holding custom front matter fields as key/value rows"""
+    
+    HEADERS = ("Key", "Value")
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[List[str]] = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole):
+            return self._rows[index.row()][index.column()]
+        return None
+    
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self._rows[index.row()][index.column()] = str(value)
+        self.dataChanged.emit(index, index)
+        return True
+    
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def insertRows(self, row, count, parent=QModelIndex()):
+        if count < 1 or row < 0 or row > len(self._rows):
+            return False
+        self.beginInsertRows(parent, row, row + count - 1)
+        self._rows[row:row] = [["", ""] for _ in range(count)]
+        self.endInsertRows()
+        return True
+    
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if count < 1 or row < 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        return True
+    
+    def set_fields(self, fields: Iterable[Tuple[Any, Any]]) -> None:
+        """Replace all rows at once from (key, value) pairs"""
+        self.beginResetModel()
+        self._rows = [[str(key), str(value)] for key, value in fields]
+        self.endResetModel()
+    
+    def append_field(self, key: str = "", value: str = "") -> None:
+        """Append a single key/value row"""
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append([key, value])
+        self.endInsertRows()
+    
+    def rows(self) -> List[List[str]]:
+        """Return the underlying [key, value] rows"""
+        return self._rows
+    
+    def to_dict(self) -> Dict[str, str]:
+        """Collect non-empty keys into a dict, reading rows without Qt calls"""
+        fields = {}
+        for key, value in self._rows:
+            key = key.strip()
+            if key:
+                fields[key] = value.strip()
+        return fields
 
 
 class FrontMatterDialog(QDialog):
     """Dialog for editing document front matter"""
     
-    def __init__(self, metadata: DocumentMetadata, parent=None):
+    def __init__(self, metadata: "DocumentMetadata", parent=None):
         super().__init__(parent)
         self.metadata = metadata
         self.setup_ui()
@@ -75,14 +183,15 @@ class FrontMatterDialog(QDialog):
         custom_group = QGroupBox("Custom Fields")
         custom_layout = QVBoxLayout(custom_group)
         
-        self.custom_table = QTableWidget(0, 2)
-        self.custom_table.setHorizontalHeaderLabels(["Key", "Value"])
+        self.custom_model = CustomFieldsModel(self)
+        self.custom_table = QTableView()
+        self.custom_table.setModel(self.custom_model)
         self.custom_table.horizontalHeader().setStretchLastSection(True)
         custom_layout.addWidget(self.custom_table)
         
         custom_buttons = QHBoxLayout()
         add_field_btn = QPushButton("Add Field")
-        add_field_btn.clicked.connect(self.add_custom_field)
+        add_field_btn.clicked.connect(lambda: self.add_custom_field())
         remove_field_btn = QPushButton("Remove Field")
         remove_field_btn.clicked.connect(self.remove_custom_field)
         custom_buttons.addWidget(add_field_btn)
@@ -100,50 +209,61 @@ class FrontMatterDialog(QDialog):
     
     def load_metadata(self):
         """Load metadata into form fields"""
-        self.title_edit.setText(self.metadata.title)
-        self.author_edit.setText(self.metadata.author)
-        self.date_edit.setText(self.metadata.date)
-        self.description_edit.setPlainText(self.metadata.description)
-        self.tags_edit.setText(", ".join(self.metadata.tags))
-        self.categories_edit.setText(", ".join(self.metadata.categories))
-        self.keywords_edit.setText(", ".join(self.metadata.keywords))
-        self.layout_combo.setCurrentText(self.metadata.layout)
-        self.draft_checkbox.setChecked(self.metadata.draft)
-        
-        # Load custom fields
-        for key, value in self.metadata.custom_fields.items():
-            self.add_custom_field(key, str(value))
+        # Suppress change notifications while the form is being filled
+        blockers = [QSignalBlocker(widget) for widget in (
+            self.title_edit,
+            self.author_edit,
+            self.date_edit,
+            self.description_edit,
+            self.tags_edit,
+            self.categories_edit,
+            self.keywords_edit,
+            self.layout_combo,
+            self.draft_checkbox,
+        )]
+        try:
+            self.title_edit.setText(self.metadata.title)
+            self.author_edit.setText(self.metadata.author)
+            self.date_edit.setText(self.metadata.date)
+            self.description_edit.setPlainText(self.metadata.description)
+            self.tags_edit.setText(", ".join(self.metadata.tags))
+            self.categories_edit.setText(", ".join(self.metadata.categories))
+            self.keywords_edit.setText(", ".join(self.metadata.keywords))
+            self.layout_combo.setCurrentText(self.metadata.layout)
+            self.draft_checkbox.setChecked(self.metadata.draft)
+        finally:
+            for blocker in blockers:
+                blocker.unblock()
+        
+        # Load custom fields in one model reset instead of a row insert each
+        self.custom_model.set_fields(self.metadata.custom_fields.items())
+    
+    def reload(self, metadata: "DocumentMetadata"):
+        """Show another metadata object in the existing form"""
+        self.metadata = metadata
+        self.load_metadata()
     
     def add_custom_field(self, key="", value=""):
         """Add a custom field row"""
-        row = self.custom_table.rowCount()
-        self.custom_table.insertRow(row)
-        self.custom_table.setItem(row, 0, QTableWidgetItem(key))
-        self.custom_table.setItem(row, 1, QTableWidgetItem(value))
+        self.custom_model.append_field(key, value)
     
     def remove_custom_field(self):
         """Remove selected custom field"""
-        current_row = self.custom_table.currentRow()
+        current_row = self.custom_table.currentIndex().row()
         if current_row >= 0:
-            self.custom_table.removeRow(current_row)
+            self.custom_model.removeRows(current_row, 1)
     
-    def get_metadata(self) -> DocumentMetadata:
+    def get_metadata(self) -> "DocumentMetadata":
         """Get metadata from form fields"""
+        from document_manager import DocumentMetadata
+        
         # Parse lists from comma-separated strings
-        tags = [tag.strip() for tag in self.tags_edit.text().split(",") if tag.strip()]
-        categories = [cat.strip() for cat in self.categories_edit.text().split(",") if cat.strip()]
-        keywords = [kw.strip() for kw in self.keywords_edit.text().split(",") if kw.strip()]
+        tags = _split_csv(self.tags_edit.text())
+        categories = _split_csv(self.categories_edit.text())
+        keywords = _split_csv(self.keywords_edit.text())
         
         # Get custom fields
-        custom_fields = {}
-        for row in range(self.custom_table.rowCount()):
-            key_item = self.custom_table.item(row, 0)
-            value_item = self.custom_table.item(row, 1)
-            if key_item and value_item:
-                key = key_item.text().strip()
-                value = value_item.text().strip()
-                if key:
-                    custom_fields[key] = value
+        custom_fields = self.custom_model.to_dict()
         
         return DocumentMetadata(
             title=self.title_edit.text(),
@@ -153,7 +273,7 @@ class FrontMatterDialog(QDialog):
             tags=tags,
             categories=categories,
             keywords=keywords,
-            layout=self.layout_combo.currentText(),
+            layout=sys.intern(self.layout_combo.currentText()),
             draft=self.draft_checkbox.isChecked(),
             custom_fields=custom_fields
         )
@@ -172,17 +292,18 @@ class SettingsDialog(QDialog):
         layout = QVBoxLayout(self)
         
         # Tab widget for different settings categories
-        tab_widget = QTabWidget()
+        self.tab_widget = QTabWidget()
         
         # Editor settings
         editor_tab = self.create_editor_settings()
-        tab_widget.addTab(editor_tab, "Editor")
+        self.tab_widget.addTab(editor_tab, "Editor")
         
-        # Export settings
-        export_tab = self.create_export_settings()
-        tab_widget.addTab(export_tab, "Export")
+        # Export settings are built the first time the tab is opened
+        self._export_tab_index = self.tab_widget.addTab(QWidget(), "Export")
+        self._export_tab_built = False
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         
-        layout.addWidget(tab_widget)
+        layout.addWidget(self.tab_widget)
         
         # Dialog buttons
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -190,14 +311,29 @@ class SettingsDialog(QDialog):
         button_box.rejected.connect(self.reject)
         layout.addWidget(button_box)
     
+    def on_tab_changed(self, index: int):
+        """Replace the export placeholder with the real tab on first visit"""
+        if index != self._export_tab_index or self._export_tab_built:
+            return
+        
+        self._export_tab_built = True
+        placeholder = self.tab_widget.widget(index)
+        with QSignalBlocker(self.tab_widget):
+            self.tab_widget.removeTab(index)
+            self.tab_widget.insertTab(index, self.create_export_settings(), "Export")
+            self.tab_widget.setCurrentIndex(index)
+        placeholder.deleteLater()
+    
     def create_editor_settings(self):
         """Create editor settings tab"""
         widget = QWidget()
         layout = QFormLayout(widget)
         
         # Font settings
-        self.font_combo = QFontComboBox()
-        self.font_combo.setCurrentFont(QFont("Cascadia Code"))
+        self.font_combo = QComboBox()
+        self.font_combo.setEditable(True)
+        self.font_combo.addItems(_font_families())
+        self.font_combo.setCurrentText("Cascadia Code")
         layout.addRow("Editor Font:", self.font_combo)
         
         self.font_size_spin = QSpinBox()
@@ -241,6 +377,16 @@ class SettingsDialog(QDialog):
         
         layout.addRow(sync_group)
         
+        # Preview cache
+        preview_group = QGroupBox("Preview")
+        preview_layout = QFormLayout(preview_group)
+        
+        self.disk_cache_check = QCheckBox("Cache large document previews on disk")
+        self.disk_cache_check.setToolTip("Stored in ~/.cache/foxmark/md")
+        preview_layout.addRow("", self.disk_cache_check)
+        
+        layout.addRow(preview_group)
+        
         return widget
     
     def create_export_settings(self):
@@ -257,19 +403,20 @@ class SettingsDialog(QDialog):
             "LaTeX", "Beamer", "RevealJS", "S5", "Slidy", "DZSlides"
         ]
         
-        self.format_checks = {}
-        for i, fmt in enumerate(formats):
-            check = QCheckBox(fmt)
+        # Hold repaints until the whole grid is populated
+        formats_group.setUpdatesEnabled(False)
+        self.format_checks = {fmt: QCheckBox(fmt) for fmt in formats}
+        for i, check in enumerate(self.format_checks.values()):
             check.setChecked(True)
-            self.format_checks[fmt] = check
             formats_layout.addWidget(check, i // 3, i % 3)
+        formats_group.setUpdatesEnabled(True)
         
         layout.addWidget(formats_group)
         
         # Default export directory
         export_dir_layout = QHBoxLayout()
         self.export_dir_edit = QLineEdit()
-        self.export_dir_edit.setText(str(Path.home() / "Documents"))
+        self.export_dir_edit.setText(_DEFAULT_EXPORT_DIR)
         export_dir_layout.addWidget(self.export_dir_edit)
         
         export_dir_browse = QPushButton("Browse...")
@@ -4,12 +4,33 @@ Document Manager
 Handles document metadata and front matter
 """
 
-from dataclasses import dataclass, field
+import io
+import logging
+import re
+import sys
+from dataclasses import dataclass, field, fields
 from typing import Dict, List, Optional, Any, Tuple
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader, CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, SafeDumper as _SafeDumper
 
-@dataclass
+
+logger = logging.getLogger(__name__)
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _intern_tokens(values: Any) -> Any:
+    """Intern the string entries of a front matter list field"""
+    if not isinstance(values, list):
+        return values
+    return [sys.intern(v) if isinstance(v, str) else v for v in values]
+
+
+@dataclass(slots=True)
 class DocumentMetadata:
     """Document front matter properties"""
     title: str = ""
@@ -24,16 +45,42 @@ class DocumentMetadata:
     custom_fields: Dict[str, Any] = field(default_factory=dict)
 
 
+# Front matter keys that map onto DocumentMetadata attributes
+_META_FIELDS = frozenset(f.name for f in fields(DocumentMetadata)) - {'custom_fields'}
+
+
 class DocumentManager:
     """Manages document metadata and front matter"""
     
-    def __init__(self):
-        self.metadata = DocumentMetadata()
+    def __init__(self) -> None:
+        self.metadata: DocumentMetadata = DocumentMetadata()
+        # Last parsed (raw YAML, metadata) pair, reused while front matter is unchanged
+        self._fm_cache: Optional[Tuple[str, DocumentMetadata]] = None
     
     def create_empty_metadata(self) -> DocumentMetadata:
         """Create empty metadata instance"""
         return DocumentMetadata()
     
+    def front_matter_end(self, text: str) -> int:
+        """Offset just past the closing '---' of leading front matter, or 0 without one"""
+        if not text.startswith('---'):
+            return 0
+        
+        # Locate the closing delimiter instead of splitting the whole buffer
+        end = text.find('\n---', 3)
+        if end < 0:
+            return 0
+        
+        return end + 4
+    
+    def _split_front_matter(self, text: str) -> Optional[Tuple[str, str]]:
+        """Split text into raw front matter and content with a single scan"""
+        end = self.front_matter_end(text)
+        if not end:
+            return None
+        
+        return text[3:end - 4], text[end:].lstrip('\n')
+    
     def parse_front_matter(self, text: str) -> Tuple[DocumentMetadata, str]:
         """Parse YAML front matter from markdown text"""
         if not text.startswith('---'):
@@ -41,52 +88,67 @@ class DocumentManager:
         
         try:
             # Split front matter and content
-            parts = text.split('---', 2)
-            if len(parts) < 3:
+            parts = self._split_front_matter(text)
+            if parts is None:
                 return self.metadata, text
             
-            yaml_content = parts[1].strip()
-            markdown_content = parts[2].lstrip('\n')
+            raw_yaml, markdown_content = parts
+            
+            # Empty block ("---" directly followed by "---"): skip YAML entirely
+            if not raw_yaml or raw_yaml.isspace():
+                return self.metadata, markdown_content
+            
+            yaml_content = raw_yaml.strip()
+            cached = self._fm_cache
+            if cached is not None and cached[0] == yaml_content:
+                return cached[1], markdown_content
             
             # Parse YAML
-            if yaml_content:
-                yaml_data = yaml.safe_load(yaml_content)
-                if yaml_data:
-                    metadata = DocumentMetadata()
-                    
-                    # Update metadata with parsed data
-                    for key, value in yaml_data.items():
-                        if hasattr(metadata, key):
-                            setattr(metadata, key, value)
-                        else:
-                            metadata.custom_fields[key] = value
-                    
-                    return metadata, markdown_content
+            yaml_data = yaml.load(yaml_content, Loader=_SafeLoader)
+            if yaml_data:
+                metadata = DocumentMetadata()
+                
+                # Update metadata with parsed data
+                for key, value in yaml_data.items():
+                    if key in _META_FIELDS:
+                        setattr(metadata, key, value)
+                    else:
+                        metadata.custom_fields[key] = value
+                
+                # Layouts and tags repeat across documents; share one copy
+                if isinstance(metadata.layout, str):
+                    metadata.layout = sys.intern(metadata.layout)
+                metadata.tags = _intern_tokens(metadata.tags)
+                metadata.categories = _intern_tokens(metadata.categories)
+                metadata.keywords = _intern_tokens(metadata.keywords)
+                
+                self._fm_cache = (yaml_content, metadata)
+                return metadata, markdown_content
             
             return self.metadata, markdown_content
             
         except yaml.YAMLError as e:
-            print(f"YAML parsing error: {e}")
+            logger.debug("YAML parsing error: %s", e)
             return self.metadata, text
         except Exception as e:
-            print(f"Front matter parsing error: {e}")
+            logger.debug("Front matter parsing error: %s", e)
             return self.metadata, text
     
     def generate_front_matter(self, metadata: DocumentMetadata) -> str:
         """Generate YAML front matter from metadata"""
         # Check if we have any meaningful content
-        has_content = any([
-            metadata.title,
-            metadata.author, 
-            metadata.date,
-            metadata.tags,
-            metadata.categories,
-            metadata.description,
-            metadata.keywords,
-            metadata.layout != "default",
-            metadata.draft,
-            metadata.custom_fields
-        ])
+        has_content = (
+            metadata.title
+            or metadata.author
+            or metadata.date
+            or metadata.tags
+            or metadata.categories
+            or metadata.description
+            or metadata.keywords
+            or metadata.layout != "default"
+            or metadata.draft
+            or metadata.custom_fields
+        )
         
         if not has_content:
             return ""
@@ -120,27 +182,34 @@ class DocumentManager:
             return ""
         
         try:
-            yaml_output = yaml.dump(
+            # Stream the YAML straight between the delimiters
+            buffer = io.StringIO()
+            buffer.write("---\n")
+            yaml.dump(
                 yaml_data, 
+                stream=buffer,
+                Dumper=_SafeDumper,
                 default_flow_style=False, 
                 sort_keys=False,
                 allow_unicode=True
             )
-            return f"---\n{yaml_output}---\n\n"
+            buffer.write("---\n\n")
+            return buffer.getvalue()
         except Exception as e:
-            print(f"YAML generation error: {e}")
+            logger.debug("YAML generation error: %s", e)
             return ""
     
     def extract_content_without_front_matter(self, text: str) -> str:
         """Extract markdown content without front matter"""
-        if text.startswith('---'):
-            parts = text.split('---', 2)
-            if len(parts) >= 3:
-                return parts[2].lstrip('\n')
+        parts = self._split_front_matter(text)
+        if parts is not None:
+            return parts[1]
         return text
     
     def update_front_matter(self, text: str, new_metadata: DocumentMetadata) -> str:
         """Update front matter in existing text"""
+        self._fm_cache = None
+        
         # Extract content without front matter
         content = self.extract_content_without_front_matter(text)
         
@@ -156,8 +225,7 @@ class DocumentManager:
         
         # Validate date format if provided
         if metadata.date:
-            import re
-            if not re.match(r'^\d{4}-\d{2}-\d{2}$', metadata.date):
+            if not _DATE_RE.match(metadata.date):
                 issues.append("Date should be in YYYY-MM-DD format")
         
         # Validate tags and categories (should be lists)
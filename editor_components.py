@@ -4,93 +4,213 @@ Editor Components
 Markdown editor and preview with perfect bidirectional sync
 """
 
+import hashlib
+import json
 import os
 import re
-from typing import List
+from collections import OrderedDict
+from functools import lru_cache
+from html.parser import HTMLParser
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebChannel import QWebChannel
 import markdown
-from markdown.extensions import codehilite, tables, toc, fenced_code, meta
+
+
+_HEADER_STRIP_RE = re.compile(r'^#+\s*')
+_TAG_RE = re.compile(r'<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*?(/?)>', re.DOTALL)
+_VOID_TAGS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr',
+))
+
+
+@lru_cache(maxsize=1)
+def _font_families() -> frozenset:
+    """Installed font families as a set, enumerated once per process"""
+    return frozenset(QFontDatabase.families())
+
+
+def split_top_level_blocks(html: str):
+    """Split rendered HTML into its top-level elements.
+    
+    Returns None when the fragment has top-level text or unbalanced tags,
+    since it then cannot be mapped onto the container's children.
+    """
+    blocks = []
+    depth = 0
+    block_start = 0
+    position = 0
+    for match in _TAG_RE.finditer(html):
+        tag = match.group(2)
+        if depth == 0:
+            if html[position:match.start()].strip():
+                return None
+            block_start = match.start()
+        
+        if tag is None:
+            # Comments are not element children; skip them
+            position = match.end()
+            continue
+        
+        if match.group(1):
+            depth -= 1
+            if depth < 0:
+                return None
+        elif not match.group(3) and tag.lower() not in _VOID_TAGS:
+            depth += 1
+        
+        if depth == 0:
+            blocks.append(html[block_start:match.end()])
+        position = match.end()
+    
+    if depth != 0 or html[position:].strip():
+        return None
+    return blocks
 
 
 class MarkdownSyntaxHighlighter(QSyntaxHighlighter):
     """Enhanced syntax highlighter with fixed regex patterns"""
     
+    # Define colors for dark theme
+    COLORS = {
+        'header': QColor('#4fc3f7'),
+        'bold': QColor('#ffcc80'),
+        'italic': QColor('#c8e6c9'),
+        'code': QColor('#f8bbd9'),
+        'link': QColor('#81c784'),
+        'quote': QColor('#bcaaa4'),
+        'list': QColor('#ffab91'),
+        'frontmatter': QColor('#ce93d8'),
+    }
+    
+    _SPAN_CACHE_SIZE = 4096
+    
+    # Combined patterns and formats indexed by capture group number, see _build_rules
+    _LINE_PATTERN = None
+    _LINE_FORMATS = ()
+    _PATTERN = None
+    _GROUP_FORMATS = ()
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.highlighting_rules = []
-        
-        # Define colors for dark theme
-        self.colors = {
-            'header': QColor('#4fc3f7'),
-            'bold': QColor('#ffcc80'),
-            'italic': QColor('#c8e6c9'),
-            'code': QColor('#f8bbd9'),
-            'link': QColor('#81c784'),
-            'quote': QColor('#bcaaa4'),
-            'list': QColor('#ffab91'),
-            'frontmatter': QColor('#ce93d8'),
-        }
-        
+        self.colors = self.COLORS
+        # block number -> (text hash, spans) from the last highlight of that block
+        self._block_spans = {}
+    
+    def setDocument(self, doc):
+        self._block_spans.clear()
+        super().setDocument(doc)
+    
+    @classmethod
+    def _build_rules(cls):
+        """Compile line-level and inline rules into two alternations once per process"""
+        colors = cls.COLORS
+        line_rules = []
+        rules = []
+        
+        # Line-level rules color the whole line; inline markup is applied on top
         # Front matter (YAML between ---)
         frontmatter_format = QTextCharFormat()
-        frontmatter_format.setForeground(self.colors['frontmatter'])
+        frontmatter_format.setForeground(colors['frontmatter'])
         frontmatter_format.setBackground(QColor('#2d1b69'))
-        self.highlighting_rules.append((QRegularExpression(r'^---.*'), frontmatter_format))
+        line_rules.append(('frontmatter', r'^---.*', frontmatter_format))
         
         # Headers (H1-H6)
         header_format = QTextCharFormat()
-        header_format.setForeground(self.colors['header'])
+        header_format.setForeground(colors['header'])
         header_format.setFontWeight(QFont.Bold)
-        # Enhanced syntax highlighting with H4-H6 support
-        self.highlighting_rules.append((QRegularExpression(r'^#{1,6}\s.*'), header_format))
+        line_rules.append(('header', r'^#{1,6}\s.*', header_format))
         
-        # Bold text (**text**)
+        # Blockquotes (>)
+        quote_format = QTextCharFormat()
+        quote_format.setForeground(colors['quote'])
+        quote_format.setFontItalic(True)
+        line_rules.append(('quote', r'^>\s.*', quote_format))
+        
+        # Lists (- * +)
+        list_format = QTextCharFormat()
+        list_format.setForeground(colors['list'])
+        line_rules.append(('list', r'^\s*[-*+]\s.*', list_format))
+        
+        # Bold text (**text**), before italic so ** is not read as two *
         bold_format = QTextCharFormat()
-        bold_format.setForeground(self.colors['bold'])
+        bold_format.setForeground(colors['bold'])
         bold_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((QRegularExpression(r'\*\*[^*]+\*\*'), bold_format))
-        
-        # Italic text (*text*)
-        italic_format = QTextCharFormat()
-        italic_format.setForeground(self.colors['italic'])
-        italic_format.setFontItalic(True)
-        self.highlighting_rules.append((QRegularExpression(r'\*[^*]+\*'), italic_format))
+        rules.append(('bold', r'\*\*[^*]+\*\*', bold_format))
         
         # Inline code (`code`)
         code_format = QTextCharFormat()
-        code_format.setForeground(self.colors['code'])
+        code_format.setForeground(colors['code'])
         code_format.setFontFamilies(['Cascadia Code', 'Consolas', 'monospace'])
-        self.highlighting_rules.append((QRegularExpression(r'`[^`]+`'), code_format))
+        rules.append(('code', r'`[^`]+`', code_format))
         
         # Links [text](url) - FIXED REGEX
         link_format = QTextCharFormat()
-        link_format.setForeground(self.colors['link'])
+        link_format.setForeground(colors['link'])
         link_format.setUnderlineStyle(QTextCharFormat.SingleUnderline)
-        self.highlighting_rules.append((QRegularExpression(r'\[[^\]]+\]\([^)]+\)'), link_format))
+        rules.append(('link', r'\[[^\]]+\]\([^)]+\)', link_format))
         
-        # Blockquotes (>)
-        quote_format = QTextCharFormat()
-        quote_format.setForeground(self.colors['quote'])
-        quote_format.setFontItalic(True)
-        self.highlighting_rules.append((QRegularExpression(r'^>\s.*'), quote_format))
+        # Italic text (*text*)
+        italic_format = QTextCharFormat()
+        italic_format.setForeground(colors['italic'])
+        italic_format.setFontItalic(True)
+        rules.append(('italic', r'\*[^*]+\*', italic_format))
         
-        # Lists (- * +)
-        list_format = QTextCharFormat()
-        list_format.setForeground(self.colors['list'])
-        self.highlighting_rules.append((QRegularExpression(r'^\s*[-*+]\s.*'), list_format))
+        # One alternation each: the leftmost match wins, earlier groups break ties
+        cls._LINE_PATTERN, cls._LINE_FORMATS = cls._compile_rules(line_rules)
+        cls._PATTERN, cls._GROUP_FORMATS = cls._compile_rules(rules)
+    
+    @staticmethod
+    def _compile_rules(rules):
+        """Join (name, regex, format) rules into one named-group pattern"""
+        pattern = QRegularExpression(
+            '|'.join(f'(?<{name}>{regex})' for name, regex, _ in rules)
+        )
+        assert pattern.isValid(), pattern.errorString()
+        pattern.optimize()
+        # Group 0 is the whole match; rule i is capture group i + 1
+        return pattern, (None,) + tuple(format for _, _, format in rules)
     
     def highlightBlock(self, text):
-        for pattern, format in self.highlighting_rules:
-            expression = pattern
-            if expression.isValid():  # Check if regex is valid
-                iterator = expression.globalMatch(text)
-                while iterator.hasNext():
-                    match = iterator.next()
-                    self.setFormat(match.capturedStart(), match.capturedLength(), format)
+        set_format = self.setFormat
+        
+        # Qt clears formats before each call, so unchanged lines replay cached spans
+        key = self.currentBlock().blockNumber()
+        text_hash = hash(text)
+        cached = self._block_spans.get(key)
+        if cached is not None and cached[0] == text_hash:
+            for start, length, format in cached[1]:
+                set_format(start, length, format)
+            return
+        
+        spans = []
+        match = self._LINE_PATTERN.match(text)
+        if match.hasMatch():
+            group = match.lastCapturedIndex()
+            span = (match.capturedStart(group), match.capturedLength(group), self._LINE_FORMATS[group])
+            set_format(*span)
+            spans.append(span)
+        
+        group_formats = self._GROUP_FORMATS
+        iterator = self._PATTERN.globalMatch(text)
+        while iterator.hasNext():
+            match = iterator.next()
+            # Rule groups don't nest, so the last captured group is the one that matched
+            group = match.lastCapturedIndex()
+            span = (match.capturedStart(group), match.capturedLength(group), group_formats[group])
+            set_format(*span)
+            spans.append(span)
+        
+        # Deleted blocks leave stale numbers behind, so start over once the cache fills
+        if len(self._block_spans) >= self._SPAN_CACHE_SIZE:
+            self._block_spans.clear()
+        self._block_spans[key] = (text_hash, tuple(spans))
+
+
+MarkdownSyntaxHighlighter._build_rules()
 
 
 class MarkdownEditor(QTextEdit):
@@ -107,7 +227,7 @@ class MarkdownEditor(QTextEdit):
         
     def setup_editor(self):
         # Improved font handling to reduce warnings
-        available_fonts = QFontDatabase.families()
+        available_fonts = _font_families()
         
         # Preferred fonts in order
         preferred_fonts = [
@@ -156,32 +276,36 @@ class MarkdownEditor(QTextEdit):
         scrollbar = self.verticalScrollBar()
         scrollbar.valueChanged.connect(self.on_scroll_changed_throttled)
         
-        # Setup scroll throttling
-        self._scroll_timer = QTimer()
-        self._scroll_timer.setSingleShot(True)
-        self._scroll_timer.timeout.connect(self.emit_scroll_change)
+        # Scroll changes are coalesced into one emit per event loop pass
+        self._scroll_pending = False
         self._last_scroll_ratio = 0.0
+        
+        # Debounce text changes so a burst of keystrokes yields one update
+        self._text_timer = QTimer(self)
+        self._text_timer.setSingleShot(True)
+        self._text_timer.timeout.connect(self.content_changed.emit)
     
     def on_scroll_changed_throttled(self):
-        """Throttled scroll change handler for smoother performance"""
+        """Record the scroll ratio and post a single deferred emit"""
         if not self.is_syncing:
-            # Cancel previous timer
-            self._scroll_timer.stop()
-            
-            # Store current ratio
             self._last_scroll_ratio = self.get_scroll_ratio()
             
-            # Start timer with very short delay for fluid scrolling
-            self._scroll_timer.start(16)  # ~60fps timing
+            # Further scroll events before the event loop comes round just
+            # update the ratio; the queued call picks up the latest value
+            if not self._scroll_pending:
+                self._scroll_pending = True
+                QTimer.singleShot(0, self.emit_scroll_change)
     
     def emit_scroll_change(self):
-        """Emit scroll change after throttling"""
+        """Emit the latest coalesced scroll ratio"""
+        self._scroll_pending = False
         if not self.is_syncing:
             self.scroll_changed.emit(self._last_scroll_ratio)
     
     def on_text_changed(self):
         if not self.is_syncing:
-            self.content_changed.emit()
+            # Restarting the timer pushes the emit past the last keystroke
+            self._text_timer.start(120)
     
     def on_cursor_position_changed(self):
         if not self.is_syncing:
@@ -236,8 +360,17 @@ class MarkdownEditor(QTextEdit):
             cursor = self.textCursor()
             position = cursor.position()
             
-            # Set content
-            self.setPlainText(content)
+            # Replace the text as one edit block so the document emits a single
+            # change and the highlighter makes one pass over the new text
+            self.blockSignals(True)
+            try:
+                edit_cursor = QTextCursor(self.document())
+                edit_cursor.beginEditBlock()
+                edit_cursor.select(QTextCursor.Document)
+                edit_cursor.insertText(content)
+                edit_cursor.endEditBlock()
+            finally:
+                self.blockSignals(False)
             
             # Restore cursor position if possible
             new_cursor = self.textCursor()
@@ -256,10 +389,9 @@ class MarkdownEditor(QTextEdit):
         else:
             cursor.insertText(f"{prefix}text{suffix}")
             # Select "text" for replacement
-            for _ in range(len(suffix) + 4):
-                cursor.movePosition(QTextCursor.Left)
-            for _ in range(4):
-                cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor)
+            end = cursor.position() - len(suffix)
+            cursor.setPosition(end - 4)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
             self.setTextCursor(cursor)
     
     def insert_header(self, level: int):
@@ -269,7 +401,7 @@ class MarkdownEditor(QTextEdit):
         current_line = cursor.block().text()
         
         # Remove existing header markers
-        clean_line = re.sub(r'^#+\s*', '', current_line)
+        clean_line = _HEADER_STRIP_RE.sub('', current_line)
         
         # Insert new header
         header_text = f"{'#' * level} {clean_line}" if clean_line else f"{'#' * level} Header {level}"
@@ -316,6 +448,31 @@ class MarkdownEditor(QTextEdit):
             cursor.insertText("![alt text](image_url)")
 
 
+class MarkdownRenderSignals(QObject):
+    """Signals for MarkdownRenderJob, delivered on the receiver's thread"""
+    finished = Signal(int, str)  # generation, html
+    failed = Signal(int, str)  # generation, error message
+
+
+class MarkdownRenderJob(QRunnable):
+    """Runs a markdown conversion on a QThreadPool worker"""
+    
+    def __init__(self, generation: int, markdown_text: str, convert):
+        super().__init__()
+        self.generation = generation
+        self.markdown_text = markdown_text
+        self.convert = convert
+        self.signals = MarkdownRenderSignals()
+    
+    def run(self):
+        try:
+            html_content = self.convert(self.markdown_text)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, html_content)
+
+
 class PreviewBridge(QObject):
     """Improved bridge for seamless communication"""
     scroll_changed = Signal(float)
@@ -335,12 +492,456 @@ class PreviewBridge(QObject):
         self.cursor_position_changed.emit(line)
 
 
+class HtmlToMarkdownConverter(HTMLParser):
+    """Single-pass HTML to Markdown converter for edited preview content"""
+    
+    HEADINGS = {
+        'h1': '# ', 'h2': '## ', 'h3': '### ',
+        'h4': '#### ', 'h5': '##### ', 'h6': '###### ',
+    }
+    
+    # Inline tags that wrap their content in the same mark on both sides
+    INLINE_MARKS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*'}
+    
+    # Pending break count -> separator, so flushing never builds a new string
+    _BREAK_STRINGS = ('', '\n', '\n\n')
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._out = []
+        self._breaks = 0   # newlines owed before the next emitted text, at most 2
+        self._lists = []   # [ordered, next item number] per open list
+        self._quotes = []  # enclosing output buffers of open blockquotes
+        self._links = []   # href (or None) per open anchor
+        self._pre = 0
+        self._after_br = False
+    
+    def convert(self, html: str) -> str:
+        """Convert an HTML fragment and return the Markdown text"""
+        self.reset()
+        self._out = []
+        self._breaks = 0
+        self._lists = []
+        self._quotes = []
+        self._links = []
+        self._pre = 0
+        self._after_br = False
+        
+        self.feed(html.strip())
+        self.close()
+        
+        # Unclosed blockquotes still hold part of the output
+        while self._quotes:
+            inner = self._out
+            self._out = self._quotes.pop()
+            self._out.extend(inner)
+        
+        # Trailing breaks are never flushed, so no blank-line cleanup is needed
+        return ''.join(self._out).strip()
+    
+    def _emit(self, text: str):
+        """Append text, first flushing any pending line breaks"""
+        out = self._out
+        breaks = self._breaks
+        if breaks:
+            # Leading breaks of a buffer are dropped, like a strip()
+            if out:
+                out.append(self._BREAK_STRINGS[breaks])
+            self._breaks = 0
+        out.append(text)
+    
+    def _break(self, count: int):
+        """Require at least count newlines before the next text"""
+        if count > self._breaks:
+            self._breaks = count
+    
+    def handle_starttag(self, tag, attrs):
+        self._after_br = False
+        mark = self.INLINE_MARKS.get(tag)
+        if mark is not None:
+            self._emit(mark)
+        elif tag in self.HEADINGS:
+            self._emit(self.HEADINGS[tag])
+        elif tag == 'code':
+            if not self._pre:
+                self._emit('`')
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            self._links.append(href)
+            if href is not None:
+                self._emit('[')
+        elif tag == 'img':
+            self.handle_startendtag(tag, attrs)
+        elif tag == 'br':
+            self._breaks = min(self._breaks + 1, 2)
+            self._after_br = True
+        elif tag in ('ul', 'ol'):
+            self._lists.append([tag == 'ol', 1])
+        elif tag == 'li':
+            self._break(1)
+            indent = '    ' * (len(self._lists) - 1)
+            if self._lists and self._lists[-1][0]:
+                self._emit(f'{indent}{self._lists[-1][1]}. ')
+                self._lists[-1][1] += 1
+            else:
+                self._emit(f'{indent}- ')
+        elif tag == 'blockquote':
+            if self._out:
+                self._emit('')
+            self._quotes.append(self._out)
+            self._out = []
+            self._breaks = 0
+        elif tag == 'pre':
+            self._pre += 1
+            self._break(1)
+            self._emit('```\n')
+        elif tag == 'hr':
+            self._break(1)
+            self._emit('---')
+            self._break(2)
+    
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'img':
+            attributes = dict(attrs)
+            src = attributes.get('src')
+            if src is not None:
+                self._emit(f"![{attributes.get('alt') or ''}]({src})")
+        else:
+            self.handle_starttag(tag, attrs)
+    
+    def handle_endtag(self, tag):
+        self._after_br = False
+        mark = self.INLINE_MARKS.get(tag)
+        if mark is not None:
+            self._emit(mark)
+        elif tag in self.HEADINGS:
+            self._break(2)
+        elif tag == 'code':
+            if not self._pre:
+                self._emit('`')
+        elif tag == 'a':
+            href = self._links.pop() if self._links else None
+            if href is not None:
+                self._emit(f']({href})')
+        elif tag == 'p':
+            if not self._lists:
+                self._break(2)
+        elif tag == 'div':
+            self._break(1)
+        elif tag in ('ul', 'ol'):
+            if self._lists:
+                self._lists.pop()
+            if not self._lists:
+                self._break(2)
+        elif tag == 'blockquote':
+            if self._quotes:
+                text = ''.join(self._out).strip()
+                self._out = self._quotes.pop()
+                self._breaks = 0
+                if text:
+                    self._emit('\n'.join(f'> {line}' for line in text.split('\n')))
+                self._break(2)
+        elif tag == 'pre':
+            if self._pre:
+                self._pre -= 1
+                if self._out and not self._out[-1].endswith('\n'):
+                    self._emit('\n')
+                self._emit('```')
+                self._break(2)
+    
+    def handle_data(self, data):
+        if self._pre:
+            self._emit(data)
+            return
+        
+        if self._after_br:
+            # Markdown emits "<br />\n"; the tag already produced the newline
+            self._after_br = False
+            if data.startswith('\n'):
+                data = data[1:]
+        
+        if self._lists:
+            # Newlines between list items are markup layout, not content
+            data = data.strip('\n')
+            if data:
+                self._emit(data)
+            return
+        
+        # Whitespace around newlines becomes pending breaks, capped at one blank line
+        body = data.strip()
+        if not body:
+            newlines = data.count('\n')
+            if newlines:
+                self._breaks = min(self._breaks + newlines, 2)
+            elif data:
+                self._emit(data)
+            return
+        
+        start = data.find(body[0])
+        leading = data[:start]
+        if '\n' in leading:
+            self._breaks = min(self._breaks + leading.count('\n'), 2)
+            leading = ''
+        trailing = data[start + len(body):]
+        self._emit(leading + body)
+        if '\n' in trailing:
+            self._breaks = min(trailing.count('\n'), 2)
+        elif trailing:
+            self._emit(trailing)
+    
+    def handle_entityref(self, name):
+        self._emit(f'&{name};')
+    
+    def handle_charref(self, name):
+        self._emit(f'&#{name};')
+
+
+# Page-side counterpart of split_top_level_blocks, shared by every preview scaffold.
+# Replaces a window of top-level blocks in #content and returns false when the
+# element count differs from what Python expects, so the caller can resend the body.
+UPDATE_BLOCKS_JS = """
+        function updateBlocks(patch) {
+            var content = document.getElementById('content');
+            if (!content) return false;
+            
+            var children = content.children;
+            if (children.length !== patch.before) return false;
+            for (var i = 0; i < patch.remove && patch.start < children.length; i++) {
+                content.removeChild(children[patch.start]);
+            }
+            
+            var template = document.createElement('template');
+            template.innerHTML = patch.blocks.join('\\n');
+            content.insertBefore(template.content, children[patch.start] || null);
+            return children.length === patch.after;
+        }
+"""
+
+# Preview page script, embedded once into the scaffold by _build_scaffold
+_PREVIEW_JS = """
+        // Ensure we don't run multiple times
+        if (window.foxmarkInitialized) {
+            // Just exit, don't return (since we're not in a function)
+            console.log('FoxMark already initialized');
+        } else {
+            window.foxmarkInitialized = true;
+            
+            var bridge;
+            var isContentChanging = false;
+            var isScrollSyncing = false;
+            var contentDebounceTimeout;
+            
+            function initializeFoxMark() {
+                var content = document.getElementById('content');
+                if (!content) {
+                    // If content doesn't exist yet, try again in a moment
+                    setTimeout(initializeFoxMark, 100);
+                    return;
+                }
+                
+                // Set initial contentEditable state
+                content.contentEditable = 'false'; // Start in read-only mode
+            }
+            
+            new QWebChannel(qt.webChannelTransport, function(channel) {
+                bridge = channel.objects.bridge;
+                initializeFoxMark();
+                
+                var content = document.getElementById('content');
+                if (!content) return;
+                
+                // Scroll synchronization aligned to animation frames
+                var scrollFramePending = false;
+                window.addEventListener('scroll', function() {
+                    if (isScrollSyncing || scrollFramePending) return;
+                    
+                    scrollFramePending = true;
+                    requestAnimationFrame(function() {
+                        scrollFramePending = false;
+                        var scrollTop = window.pageYOffset || document.documentElement.scrollTop;
+                        var scrollHeight = Math.max(0, document.documentElement.scrollHeight - window.innerHeight);
+                        var ratio = scrollHeight > 0 ? scrollTop / scrollHeight : 0;
+                        
+                        if (bridge && bridge.on_scroll_changed) {
+                            bridge.on_scroll_changed(ratio);
+                        }
+                    });
+                });
+                
+                // Optimized content editing with reduced debounce
+                var lastInputTime = 0;
+                content.addEventListener('input', function(e) {
+                    if (isContentChanging) return;
+                    
+                    var now = performance.now();
+                    lastInputTime = now;
+                    
+                    clearTimeout(contentDebounceTimeout);
+                    contentDebounceTimeout = setTimeout(function() {
+                        // Only process if this is the latest input
+                        if (performance.now() - lastInputTime < 100) {
+                            var htmlContent = content.innerHTML;
+                            
+                            if (bridge && bridge.on_content_changed) {
+                                bridge.on_content_changed(htmlContent);
+                            }
+                        }
+                    }, 150); // Reduced from 300ms
+                });
+                
+                // Improved paste handling
+                content.addEventListener('paste', function(e) {
+                    e.preventDefault();
+                    var text = (e.originalEvent || e).clipboardData.getData('text/plain');
+                    
+                    // Insert as plain text
+                    var selection = window.getSelection();
+                    if (selection.rangeCount) {
+                        var range = selection.getRangeAt(0);
+                        range.deleteContents();
+                        
+                        // Split by lines and insert properly
+                        var lines = text.split('\\n');
+                        for (var i = 0; i < lines.length; i++) {
+                            if (i > 0) {
+                                range.insertNode(document.createElement('br'));
+                            }
+                            range.insertNode(document.createTextNode(lines[i]));
+                            range.collapse(false);
+                        }
+                        
+                        selection.removeAllRanges();
+                        selection.addRange(range);
+                    }
+                    
+                    // Immediate content change notification
+                    setTimeout(function() {
+                        content.dispatchEvent(new Event('input'));
+                    }, 50);
+                });
+                
+                // Element -> line number index, rebuilt on structural changes
+                var lineIndex = new Map();
+                function rebuildLineIndex() {
+                    lineIndex.clear();
+                    var i = 0;
+                    document.querySelectorAll('h1, h2, h3, h4, h5, h6, p, li').forEach(function(e) {
+                        lineIndex.set(e, i++);
+                    });
+                }
+                
+                // Fast cursor position tracking
+                var cursorRaf = 0;
+                document.addEventListener('selectionchange', function() {
+                    if (cursorRaf) return;
+                    cursorRaf = requestAnimationFrame(function() {
+                        cursorRaf = 0;
+                        var selection = window.getSelection();
+                        if (selection.rangeCount > 0) {
+                            var range = selection.getRangeAt(0);
+                            var element = range.startContainer.nodeType === Node.TEXT_NODE 
+                                ? range.startContainer.parentNode 
+                                : range.startContainer;
+                            
+                            var lineNumber = lineIndex.get(element);
+                            
+                            if (lineNumber !== undefined && bridge && bridge.on_cursor_changed) {
+                                bridge.on_cursor_changed(lineNumber);
+                            }
+                        }
+                    });
+                });
+                
+                // Prevent drag and drop
+                ['dragover', 'drop'].forEach(function(eventName) {
+                    content.addEventListener(eventName, function(e) {
+                        e.preventDefault();
+                    });
+                });
+                
+                // Enhanced table editing
+                function enableCell(cell) {
+                    if (cell.isContentEditable) return;
+                    cell.setAttribute('contenteditable', 'true');
+                    cell.style.outline = 'none';
+                }
+                
+                function makeTablesEditable() {
+                    document.querySelectorAll('table td, table th').forEach(enableCell);
+                }
+                
+                function enableAddedCells(mutations) {
+                    mutations.forEach(function(m) {
+                        m.addedNodes.forEach(function(n) {
+                            if (n.nodeType !== 1) return;
+                            if (n.matches('td, th')) {
+                                enableCell(n);
+                            } else {
+                                n.querySelectorAll('td, th').forEach(enableCell);
+                            }
+                        });
+                    });
+                }
+                
+                // Initial setup and re-setup after content changes
+                makeTablesEditable();
+                rebuildLineIndex();
+                var moQueue = [];
+                var moRaf = 0;
+                function insideCell(m) {
+                    return m.target.closest && m.target.closest('td, th');
+                }
+                
+                var observer = new MutationObserver(function(mutations) {
+                    // Typing inside an editable cell never adds new cells or blocks
+                    if (mutations.every(insideCell)) return;
+                    Array.prototype.push.apply(moQueue, mutations);
+                    if (moRaf) return;
+                    moRaf = requestAnimationFrame(function() {
+                        moRaf = 0;
+                        var pending = moQueue;
+                        moQueue = [];
+                        rebuildLineIndex();
+                        enableAddedCells(pending);
+                    });
+                });
+                observer.observe(content, { childList: true, subtree: true });
+            });
+            
+            // Global sync state management
+            function setSyncState(syncing) {
+                isContentChanging = syncing;
+                isScrollSyncing = syncing;
+            }
+            
+            window.setSyncState = setSyncState;
+            
+            // Performance optimization
+            window.requestIdleCallback = window.requestIdleCallback || function(cb) {
+                return requestAnimationFrame(function(ts) {
+                    cb({
+                        didTimeout: false,
+                        timeRemaining: function() {
+                            return Math.max(0, 16 - (performance.now() - ts));
+                        }
+                    });
+                });
+            };
+            window.cancelIdleCallback = window.cancelIdleCallback || function(id) {
+                cancelAnimationFrame(id);
+            };
+        }
+        """
+
+
 class MarkdownPreview(QWebEngineView):
     """Improved preview with better bidirectional editing"""
     scroll_sync_requested = Signal(float)
     content_edited = Signal(str)
     cursor_sync_requested = Signal(int)
     
+    _HTML_CACHE_SIZE = 32
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.markdown_processor = markdown.Markdown(
@@ -353,6 +954,12 @@ class MarkdownPreview(QWebEngineView):
             }
         )
         
+        # Reused for every preview edit; convert() resets its state
+        self._html_converter = HtmlToMarkdownConverter()
+        
+        # Recent conversions by text digest, so undo/redo re-renders without re-parsing
+        self._html_cache = OrderedDict()
+        
         # Web channel for bidirectional communication
         self.channel = QWebChannel()
         self.page().setWebChannel(self.channel)
@@ -370,14 +977,30 @@ class MarkdownPreview(QWebEngineView):
         self.last_markdown_content = ""
         self.is_updating = False
         
-        # Set initial content
-        self.update_preview("")
+        # Background rendering: one job in flight, newest text queued behind it
+        self._render_generation = 0
+        self._render_job = None
+        self._render_key = None
+        self._queued_markdown = None
+        
+        # The page scaffold is loaded once; updates only replace #content
+        self._page_loaded = False
+        self._pending_html = None
+        self._prev_blocks = None  # top-level blocks currently shown in #content
+        self._shown_html = None  # latest HTML sent to #content, whole or patched
+        self._js_queue = []
+        self.loadFinished.connect(self._on_load_finished)
+        self._build_scaffold()
+        self._load_scaffold()
     
     def on_content_edited(self, html_content: str):
         """Handle content edited in preview - convert back to markdown"""
         if self.is_updating:
             return
         
+        # The DOM no longer matches the last render; next update replaces it whole
+        self._prev_blocks = None
+        
         # Simple HTML to Markdown conversion
         markdown_content = self.html_to_markdown(html_content)
         
@@ -387,151 +1010,197 @@ class MarkdownPreview(QWebEngineView):
             self.content_edited.emit(markdown_content)
     
     def html_to_markdown(self, html: str) -> str:
-        """Convert HTML back to Markdown - improved conversion"""
-        import re
-        
-        # Clean up HTML
-        text = html.strip()
-        
-        # Convert headers
-        text = re.sub(r'<h1[^>]*>(.*?)</h1>', r'# \1', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<h2[^>]*>(.*?)</h2>', r'## \1', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<h3[^>]*>(.*?)</h3>', r'### \1', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<h4[^>]*>(.*?)</h4>', r'#### \1', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<h5[^>]*>(.*?)</h5>', r'##### \1', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<h6[^>]*>(.*?)</h6>', r'###### \1', text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Convert formatting
-        text = re.sub(r'<strong[^>]*>(.*?)</strong>', r'**\1**', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<b[^>]*>(.*?)</b>', r'**\1**', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<em[^>]*>(.*?)</em>', r'*\1*', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<i[^>]*>(.*?)</i>', r'*\1*', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<code[^>]*>(.*?)</code>', r'`\1`', text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Convert links
-        text = re.sub(r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>', r'[\2](\1)', text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Convert images
-        text = re.sub(r'<img[^>]*src=["\']([^"\']*)["\'][^>]*alt=["\']([^"\']*)["\'][^>]*/?>', r'![\2](\1)', text, flags=re.IGNORECASE)
-        text = re.sub(r'<img[^>]*alt=["\']([^"\']*)["\'][^>]*src=["\']([^"\']*)["\'][^>]*/?>', r'![\1](\2)', text, flags=re.IGNORECASE)
-        
-        # Convert paragraphs
-        text = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Convert line breaks
-        text = re.sub(r'<br[^>]*/?>', r'\n', text, flags=re.IGNORECASE)
-        
-        # Convert lists
-        text = re.sub(r'<ul[^>]*>(.*?)</ul>', lambda m: self.convert_list(m.group(1), False), text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<ol[^>]*>(.*?)</ol>', lambda m: self.convert_list(m.group(1), True), text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Convert blockquotes
-        text = re.sub(r'<blockquote[^>]*>(.*?)</blockquote>', lambda m: '\n'.join(f'> {line}' for line in m.group(1).strip().split('\n')), text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Remove remaining HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Clean up whitespace
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
-        text = text.strip()
-        
-        return text
-    
-    def convert_list(self, list_content: str, ordered: bool) -> str:
-        """Convert HTML list to Markdown"""
-        import re
-        items = re.findall(r'<li[^>]*>(.*?)</li>', list_content, re.IGNORECASE | re.DOTALL)
-        result = []
-        
-        for i, item in enumerate(items):
-            item = item.strip()
-            if ordered:
-                result.append(f"{i+1}. {item}")
-            else:
-                result.append(f"- {item}")
-        
-        return '\n' + '\n'.join(result) + '\n\n'
+        """Convert HTML back to Markdown in a single tokenizing pass"""
+        return self._html_converter.convert(html)
     
     def update_preview(self, markdown_text: str, preserve_scroll: bool = True):
-        """Update preview with anti-flashing optimization"""
+        """Update preview content in place, keeping scroll position and page state"""
         # Skip update if content hasn't actually changed
-        if self.is_updating or markdown_text == self.last_markdown_content:
+        if markdown_text == self.last_markdown_content:
             return
         
         # Check if content is meaningfully different (ignore whitespace-only changes)
         if self.last_markdown_content and markdown_text.strip() == self.last_markdown_content.strip():
             return
         
-        self.is_updating = True
         self.last_markdown_content = markdown_text
+        self._render_generation += 1
         
-        try:
-            # Store scroll position more reliably
-            scroll_position = 0
-            if preserve_scroll:
-                # Use synchronous method to get scroll position
-                self.page().runJavaScript(
-                    "window.pageYOffset || document.documentElement.scrollTop || 0",
-                    lambda result: setattr(self, '_stored_scroll', result or 0)
-                )
-                # Give it a moment to execute
-                QTimer.singleShot(10, lambda: self._do_html_update(markdown_text))
-                return
-            else:
-                self._do_html_update(markdown_text)
+        if self._render_job is not None:
+            self._queued_markdown = markdown_text
+            return
+        self._start_render(markdown_text)
+    
+    def _start_render(self, markdown_text: str):
+        """Convert markdown on the thread pool; the result arrives as a signal"""
+        key = self._cache_key(markdown_text)
+        html_content = self._html_cache.get(key)
+        if html_content is not None:
+            self._html_cache.move_to_end(key)
+            self._apply_html(html_content)
+            return
         
-        finally:
-            # Longer delay before allowing next update to prevent flashing
-            QTimer.singleShot(300, lambda: setattr(self, 'is_updating', False))
+        self._render_key = key
+        job = MarkdownRenderJob(self._render_generation, markdown_text, self._convert)
+        job.signals.finished.connect(self._on_render_finished)
+        job.signals.failed.connect(self._on_render_failed)
+        self._render_job = job
+        QThreadPool.globalInstance().start(job)
     
-    def _do_html_update(self, markdown_text: str):
-        """Perform the actual HTML update"""
-        try:
-            # Convert markdown to HTML
-            html_content = self.markdown_processor.convert(markdown_text)
-            
-            # Create optimized HTML with safer contentEditable handling
-            full_html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-                <style>
-                    {self.get_preview_css()}
-                </style>
-            </head>
-            <body>
-                <div class="markdown-body" id="content">
-                    {html_content}
-                </div>
-                <script>
-                    // Wait for DOM to be ready before setting up
-                    document.addEventListener('DOMContentLoaded', function() {{
-                        {self.get_optimized_preview_js()}
-                    }});
-                    
-                    // Also run immediately in case DOM is already loaded
-                    if (document.readyState === 'complete') {{
-                        {self.get_optimized_preview_js()}
-                    }}
-                </script>
-            </body>
-            </html>
-            """
-            
-            # Set HTML content
-            self.setHtml(full_html)
-            
-            # Restore scroll position with longer delay for stability
-            if hasattr(self, '_stored_scroll'):
-                stored_scroll = getattr(self, '_stored_scroll', 0)
-                QTimer.singleShot(150, lambda: self.page().runJavaScript(f"window.scrollTo(0, {stored_scroll})"))
+    def _start_queued_render(self) -> bool:
+        """Start the queued conversion, if any; return whether one was started"""
+        self._render_job = None
+        queued, self._queued_markdown = self._queued_markdown, None
+        if queued is None:
+            return False
+        self._start_render(queued)
+        return True
+    
+    def _on_render_finished(self, generation: int, html_content: str):
+        """Apply a finished conversion unless newer text superseded it"""
+        cache = self._html_cache
+        cache[self._render_key] = html_content
+        if len(cache) > self._HTML_CACHE_SIZE:
+            cache.popitem(last=False)
+        
+        if self._start_queued_render() or generation != self._render_generation:
+            return
+        self._apply_html(html_content)
+    
+    def _on_render_failed(self, generation: int, error: str):
+        print(f"Preview update error: {error}")
+        self._start_queued_render()
+    
+    def _end_update(self):
+        """Release the guard that ignores edits echoed by an update"""
+        self.is_updating = False
+    
+    @staticmethod
+    def _cache_key(markdown_text: str) -> str:
+        return hashlib.blake2b(markdown_text.encode('utf-8', 'surrogatepass'), digest_size=8).hexdigest()
+    
+    def _convert(self, markdown_text: str) -> str:
+        """Convert markdown with a processor reset to per-document state"""
+        return self.markdown_processor.reset().convert(markdown_text)
+    
+    def _build_scaffold(self):
+        """Assemble the static page around #content once per preview"""
+        self._html_prefix = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+            <style>
+                {self.get_preview_css()}
+            </style>
+        </head>
+        <body>
+            <div class="markdown-body" id="content">"""
+        self._html_suffix = f"""</div>
+            <script>{UPDATE_BLOCKS_JS}</script>
+            <script>
+                function foxmarkSetup() {{
+                    {self.get_optimized_preview_js()}
+                }}
+                
+                // Wait for DOM to be ready, or run now if it already is
+                if (document.readyState === 'loading') {{
+                    document.addEventListener('DOMContentLoaded', foxmarkSetup);
+                }} else {{
+                    foxmarkSetup();
+                }}
+            </script>
+        </body>
+        </html>
+        """
+    
+    def _load_scaffold(self):
+        """Load the static page (CSS, scripts, empty #content) once"""
+        self._page_loaded = False
+        self._prev_blocks = None
+        self.setHtml(self._html_prefix + self._html_suffix)
+    
+    def _on_load_finished(self, ok: bool):
+        """Flush content rendered before the scaffold finished loading"""
+        self._page_loaded = True
+        if self._pending_html is not None:
+            html_content, self._pending_html = self._pending_html, None
+            self._set_content_html(html_content)
+    
+    def _run_js(self, code: str):
+        """Queue a script; all scripts queued in one event loop turn share one call"""
+        self._js_queue.append(code)
+        if len(self._js_queue) == 1:
+            QTimer.singleShot(0, self._flush_js)
+    
+    def _flush_js(self):
+        """Send queued scripts across the page boundary in a single runJavaScript"""
+        queue, self._js_queue = self._js_queue, []
+        if queue:
+            # Each snippet gets its own scope so var declarations cannot collide;
+            # the script evaluates to the list of their return values
+            self.page().runJavaScript(
+                '[' + ',\n'.join(f'(function() {{\n{code}\n}})()' for code in queue) + ']',
+                self._on_js_results
+            )
+    
+    def _on_js_results(self, results):
+        """Replace the whole body when a block patch found the page out of step"""
+        # The browser may split or merge malformed HTML differently from split_top_level_blocks
+        if results and any(result is False for result in results) and self._shown_html is not None:
+            self._set_content_html(self._shown_html)
+    
+    def _set_content_html(self, html_content: str):
+        """Replace the rendered body without reloading the page"""
+        self._shown_html = html_content
+        self._prev_blocks = split_top_level_blocks(html_content)
+        self._run_js(
+            f"document.getElementById('content').innerHTML = {json.dumps(html_content)};"
+        )
+    
+    def _patch_content_html(self, html_content: str):
+        """Send only the run of top-level blocks that differs from the last render"""
+        previous = self._prev_blocks
+        blocks = split_top_level_blocks(html_content)
+        if previous is None or blocks is None:
+            self._set_content_html(html_content)
+            return
         
-        except Exception as e:
-            print(f"Preview update error: {e}")
-            # Reset updating flag on error
-            self.is_updating = False
+        # Trim the common prefix and suffix; what remains is the changed window
+        old_count, new_count = len(previous), len(blocks)
+        limit = min(old_count, new_count)
+        start = 0
+        while start < limit and previous[start] == blocks[start]:
+            start += 1
+        end = 0
+        while end < limit - start and previous[old_count - 1 - end] == blocks[new_count - 1 - end]:
+            end += 1
+        
+        self._prev_blocks = blocks
+        self._shown_html = html_content
+        if start == old_count == new_count:
+            return
+        
+        patch = {
+            'start': start,
+            'remove': old_count - start - end,
+            'blocks': blocks[start:new_count - end],
+            'before': old_count,
+            'after': new_count,
+        }
+        self._run_js(f"return updateBlocks({json.dumps(patch)});")
+    
+    def _apply_html(self, html_content: str):
+        """Show rendered HTML, holding it until the scaffold has loaded"""
+        self.is_updating = True
+        if self._page_loaded:
+            self._patch_content_html(html_content)
+        else:
+            self._pending_html = html_content
+        
+        # Short guard so preview edits echoed by the update are ignored
+        QTimer.singleShot(30, self._end_update)
     
     def escape_for_data_attr(self, text: str) -> str:
         """Escape text for use in HTML data attribute"""
@@ -547,7 +1216,7 @@ class MarkdownPreview(QWebEngineView):
             setTimeout(() => {{ window.isScrollSyncing = false; }}, 100);
         }}
         """
-        self.page().runJavaScript(js_code)
+        self._run_js(js_code)
     
     def scroll_to_line(self, line_number: int):
         """Scroll to specific line with improved targeting"""
@@ -579,7 +1248,7 @@ class MarkdownPreview(QWebEngineView):
             }});
         }}
         """
-        self.page().runJavaScript(js_code)
+        self._run_js(js_code)
     
     def get_preview_css(self):
         return """
@@ -727,169 +1396,4 @@ class MarkdownPreview(QWebEngineView):
         """
     
     def get_optimized_preview_js(self):
-        return """
-        // Ensure we don't run multiple times
-        if (window.foxmarkInitialized) {
-            // Just exit, don't return (since we're not in a function)
-            console.log('FoxMark already initialized');
-        } else {
-            window.foxmarkInitialized = true;
-            
-            var bridge;
-            var isContentChanging = false;
-            var isScrollSyncing = false;
-            var scrollDebounceTimeout;
-            var contentDebounceTimeout;
-            
-            function initializeFoxMark() {
-                var content = document.getElementById('content');
-                if (!content) {
-                    // If content doesn't exist yet, try again in a moment
-                    setTimeout(initializeFoxMark, 100);
-                    return;
-                }
-                
-                // Set initial contentEditable state
-                content.contentEditable = 'false'; // Start in read-only mode
-            }
-            
-            new QWebChannel(qt.webChannelTransport, function(channel) {
-                bridge = channel.objects.bridge;
-                initializeFoxMark();
-                
-                var content = document.getElementById('content');
-                if (!content) return;
-                
-                // Optimized scroll synchronization with 60fps throttling
-                var lastScrollTime = 0;
-                window.addEventListener('scroll', function() {
-                    if (isScrollSyncing) return;
-                    
-                    var now = performance.now();
-                    if (now - lastScrollTime < 16) return; // 60fps throttling
-                    lastScrollTime = now;
-                    
-                    clearTimeout(scrollDebounceTimeout);
-                    scrollDebounceTimeout = setTimeout(function() {
-                        var scrollTop = window.pageYOffset || document.documentElement.scrollTop;
-                        var scrollHeight = Math.max(0, document.documentElement.scrollHeight - window.innerHeight);
-                        var ratio = scrollHeight > 0 ? scrollTop / scrollHeight : 0;
-                        
-                        if (bridge && bridge.on_scroll_changed) {
-                            bridge.on_scroll_changed(ratio);
-                        }
-                    }, 8); // Very fast response
-                });
-                
-                // Optimized content editing with reduced debounce
-                var lastInputTime = 0;
-                content.addEventListener('input', function(e) {
-                    if (isContentChanging) return;
-                    
-                    var now = performance.now();
-                    lastInputTime = now;
-                    
-                    clearTimeout(contentDebounceTimeout);
-                    contentDebounceTimeout = setTimeout(function() {
-                        // Only process if this is the latest input
-                        if (performance.now() - lastInputTime < 100) {
-                            var htmlContent = content.innerHTML;
-                            
-                            if (bridge && bridge.on_content_changed) {
-                                bridge.on_content_changed(htmlContent);
-                            }
-                        }
-                    }, 150); // Reduced from 300ms
-                });
-                
-                // Improved paste handling
-                content.addEventListener('paste', function(e) {
-                    e.preventDefault();
-                    var text = (e.originalEvent || e).clipboardData.getData('text/plain');
-                    
-                    // Insert as plain text
-                    var selection = window.getSelection();
-                    if (selection.rangeCount) {
-                        var range = selection.getRangeAt(0);
-                        range.deleteContents();
-                        
-                        // Split by lines and insert properly
-                        var lines = text.split('\\n');
-                        for (var i = 0; i < lines.length; i++) {
-                            if (i > 0) {
-                                range.insertNode(document.createElement('br'));
-                            }
-                            range.insertNode(document.createTextNode(lines[i]));
-                            range.collapse(false);
-                        }
-                        
-                        selection.removeAllRanges();
-                        selection.addRange(range);
-                    }
-                    
-                    // Immediate content change notification
-                    setTimeout(function() {
-                        content.dispatchEvent(new Event('input'));
-                    }, 50);
-                });
-                
-                // Fast cursor position tracking
-                var cursorDebounceTimeout;
-                document.addEventListener('selectionchange', function() {
-                    clearTimeout(cursorDebounceTimeout);
-                    cursorDebounceTimeout = setTimeout(function() {
-                        var selection = window.getSelection();
-                        if (selection.rangeCount > 0) {
-                            var range = selection.getRangeAt(0);
-                            var element = range.startContainer.nodeType === Node.TEXT_NODE 
-                                ? range.startContainer.parentNode 
-                                : range.startContainer;
-                            
-                            var allElements = Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6, p, li'));
-                            var lineNumber = allElements.indexOf(element);
-                            
-                            if (lineNumber >= 0 && bridge && bridge.on_cursor_changed) {
-                                bridge.on_cursor_changed(lineNumber);
-                            }
-                        }
-                    }, 25); // Faster cursor tracking
-                });
-                
-                // Prevent drag and drop
-                ['dragover', 'drop'].forEach(function(eventName) {
-                    content.addEventListener(eventName, function(e) {
-                        e.preventDefault();
-                    });
-                });
-                
-                // Enhanced table editing
-                function makeTablesEditable() {
-                    var cells = document.querySelectorAll('table td, table th');
-                    cells.forEach(function(cell) {
-                        cell.setAttribute('contenteditable', 'true');
-                        cell.style.outline = 'none';
-                    });
-                }
-                
-                // Initial setup and re-setup after content changes
-                makeTablesEditable();
-                var observer = new MutationObserver(function() {
-                    setTimeout(makeTablesEditable, 10);
-                });
-                observer.observe(content, { childList: true, subtree: true });
-            });
-            
-            // Global sync state management
-            function setSyncState(syncing) {
-                isContentChanging = syncing;
-                isScrollSyncing = syncing;
-            }
-            
-            window.setSyncState = setSyncState;
-            
-            // Performance optimization
-            window.requestIdleCallback = window.requestIdleCallback || function(cb) {
-                return setTimeout(cb, 1);
-            };
-        }
-        """
\ No newline at end of file
+        return _PREVIEW_JS
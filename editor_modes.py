@@ -6,12 +6,48 @@ Manages switching between Markdown and WYSIWYG modes
 
 import re
 from enum import Enum
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
 
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.+)')
+_LINK_RE = re.compile(r'\[([^\]]*)\]\(([^)]*)\)')
+_LIST_RE = re.compile(r'^(\s*)([-*+])\s+')
+_INLINE_CODE_RE = re.compile(r'`[^`]*`')
+_WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+_CLEAN_WORD_RE = re.compile(r'[^\w]')
+_TRAILING_WS_RE = re.compile(r'[ \t]+$', re.MULTILINE)
+_LINE_RE = re.compile(r'^.*$', re.MULTILINE)
+_PLACEHOLDER_URLS = frozenset({'', 'url', 'URL', '#', 'javascript:void(0)'})
+
+# Cheap whole-document tests; a rule is skipped when its predicate is false
+_FEATURES = {
+    'front_matter_title': lambda c: '#' in c,
+    'heading_hierarchy': lambda c: '#' in c,
+    'empty_links': lambda c: '](' in c,
+    'duplicate_headings': lambda c: '#' in c,
+    'list_marker_consistency': lambda c: '-' in c or '*' in c or '+' in c,
+}
+
+
+@lru_cache(maxsize=8192)
+def _is_word_correct(word: str, custom_words: frozenset) -> bool:
+    """Cached spelling check for SpellChecker.is_word_correct"""
+    # Remove punctuation and convert to lowercase
+    clean_word = _CLEAN_WORD_RE.sub('', word.lower())
+    
+    # Skip very short words, numbers, and custom words
+    if len(clean_word) <= 2 or clean_word.isdigit() or clean_word in custom_words:
+        return True
+    
+    # This is a basic implementation - in a real app you'd use a proper spell checker
+    # like pyspellchecker, enchant, or integrate with system spell checker
+    return True  # For now, assume all words are correct
+
+
 class EditorMode(Enum):
     """Editor mode enumeration"""
     MARKDOWN = "markdown"
@@ -61,7 +97,7 @@ class ModeToggleWidget(QWidget):
         
         # Mode indicator
         self.indicator = QLabel("●")
-        self.indicator.setStyleSheet("color: #4fc3f7; font-size: 16px;")
+        self.indicator.setProperty("mode", EditorMode.MARKDOWN.value)
         self.indicator.setToolTip("Current editor mode")
         layout.addWidget(self.indicator)
         
@@ -96,6 +132,16 @@ class ModeToggleWidget(QWidget):
             color: #e1e4e8;
             font-weight: bold;
         }
+        
+        QLabel[mode="markdown"] {
+            color: #4fc3f7;
+            font-size: 16px;
+        }
+        
+        QLabel[mode="wysiwyg"] {
+            color: #fb8500;
+            font-size: 16px;
+        }
         """
         self.setStyleSheet(style)
     
@@ -108,12 +154,13 @@ class ModeToggleWidget(QWidget):
             self.markdown_btn.setChecked(mode == EditorMode.MARKDOWN)
             self.wysiwyg_btn.setChecked(mode == EditorMode.WYSIWYG)
             
-            # Update indicator
+            # Update indicator; the colour comes from the mode property selectors
+            self.indicator.setProperty("mode", mode.value)
+            self.indicator.style().unpolish(self.indicator)
+            self.indicator.style().polish(self.indicator)
             if mode == EditorMode.MARKDOWN:
-                self.indicator.setStyleSheet("color: #4fc3f7; font-size: 16px;")
                 self.indicator.setToolTip("Markdown Mode - Source editing")
             else:
-                self.indicator.setStyleSheet("color: #fb8500; font-size: 16px;")
                 self.indicator.setToolTip("WYSIWYG Mode - Visual editing")
             
             # Emit signal
@@ -128,33 +175,44 @@ class MarkdownLinter:
     """Markdown linting and validation"""
     
     def __init__(self):
-        self.rules = {
-            'front_matter_title': self.check_front_matter_title,
-            'heading_hierarchy': self.check_heading_hierarchy,
-            'line_length': self.check_line_length,
-            'trailing_whitespace': self.check_trailing_whitespace,
-            'empty_links': self.check_empty_links,
-            'duplicate_headings': self.check_duplicate_headings,
-            'list_marker_consistency': self.check_list_markers,
-        }
+        # (name, rule, cost hint); cheap whole-text scans run first
+        self.rules = sorted([
+            ('front_matter_title', self.check_front_matter_title, 2),
+            ('heading_hierarchy', self.check_heading_hierarchy, 3),
+            ('line_length', self.check_line_length, 1),
+            ('trailing_whitespace', self.check_trailing_whitespace, 1),
+            ('empty_links', self.check_empty_links, 2),
+            ('duplicate_headings', self.check_duplicate_headings, 3),
+            ('list_marker_consistency', self.check_list_markers, 3),
+        ], key=lambda rule: rule[2])
     
-    def lint_document(self, content: str, front_matter_title: str = "") -> List[dict]:
-        """Lint markdown document and return issues"""
+    def lint_document(self, content: str, front_matter_title: str = "",
+                      max_issues: Optional[int] = None) -> List[dict]:
+        """Lint markdown document and return issues, stopping once max_issues is reached"""
         issues = []
         
-        for rule_name, rule_func in self.rules.items():
+        # Split once; every rule walks the same line list
+        lines = content.split('\n')
+        
+        for rule_name, rule_func, _ in self.rules:
+            has_feature = _FEATURES.get(rule_name)
+            if has_feature and not has_feature(content):
+                continue
+            
             try:
-                rule_issues = rule_func(content, front_matter_title)
+                rule_issues = rule_func(content, lines, front_matter_title)
                 issues.extend(rule_issues)
             except Exception as e:
                 print(f"Linting rule {rule_name} failed: {e}")
+            
+            if max_issues and len(issues) >= max_issues:
+                break
         
         return issues
     
-    def check_front_matter_title(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_front_matter_title(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check if document has proper title structure"""
         issues = []
-        lines = content.split('\n')
         
         # Skip front matter
         start_line = 0
@@ -167,8 +225,9 @@ class MarkdownLinter:
         # Look for first heading
         first_heading_level = None
         for i, line in enumerate(lines[start_line:], start_line):
-            if line.strip().startswith('#'):
-                heading_match = re.match(r'^(#{1,6})\s+(.+)', line.strip())
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                heading_match = _HEADING_RE.match(stripped)
                 if heading_match:
                     first_heading_level = len(heading_match.group(1))
                     break
@@ -184,18 +243,18 @@ class MarkdownLinter:
         
         return issues
     
-    def check_heading_hierarchy(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_heading_hierarchy(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check heading hierarchy (no skipping levels)"""
         issues = []
-        lines = content.split('\n')
         
         previous_level = 0
         if front_matter_title:
             previous_level = 1  # Front matter title counts as H1
         
         for line_num, line in enumerate(lines, 1):
-            if line.strip().startswith('#'):
-                heading_match = re.match(r'^(#{1,6})\s+(.+)', line.strip())
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                heading_match = _HEADING_RE.match(stripped)
                 if heading_match:
                     current_level = len(heading_match.group(1))
                     
@@ -212,56 +271,61 @@ class MarkdownLinter:
         
         return issues
     
-    def check_line_length(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_line_length(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check for overly long lines"""
         issues = []
-        lines = content.split('\n')
         max_length = 120
         
-        for line_num, line in enumerate(lines, 1):
+        # Measure lines from match spans; only long lines are materialized
+        for line_num, match in enumerate(_LINE_RE.finditer(content), 1):
+            length = match.end() - match.start()
+            if length <= max_length:
+                continue
+            
             # Skip code blocks and tables
-            if line.strip().startswith('```') or line.strip().startswith('|'):
+            if match.group().lstrip().startswith(('```', '|')):
                 continue
             
-            if len(line) > max_length:
-                issues.append({
-                    'type': 'info',
-                    'message': f'Line is {len(line)} characters long. Consider breaking at {max_length} characters.',
-                    'line': line_num,
-                    'rule': 'line_length'
-                })
+            issues.append({
+                'type': 'info',
+                'message': f'Line is {length} characters long. Consider breaking at {max_length} characters.',
+                'line': line_num,
+                'rule': 'line_length'
+            })
         
         return issues
     
-    def check_trailing_whitespace(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_trailing_whitespace(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check for trailing whitespace"""
         issues = []
-        lines = content.split('\n')
         
-        for line_num, line in enumerate(lines, 1):
-            if line.endswith(' ') or line.endswith('\t'):
-                issues.append({
-                    'type': 'warning',
-                    'message': 'Line has trailing whitespace.',
-                    'line': line_num,
-                    'rule': 'trailing_whitespace'
-                })
+        # One scan over the whole text; line numbers advance by counting
+        # newlines between consecutive matches
+        line_num = 1
+        position = 0
+        for match in _TRAILING_WS_RE.finditer(content):
+            line_num += content.count('\n', position, match.start())
+            position = match.start()
+            issues.append({
+                'type': 'warning',
+                'message': 'Line has trailing whitespace.',
+                'line': line_num,
+                'rule': 'trailing_whitespace'
+            })
         
         return issues
     
-    def check_empty_links(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_empty_links(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check for empty or placeholder links"""
         issues = []
-        lines = content.split('\n')
         
         for line_num, line in enumerate(lines, 1):
             # Find markdown links
-            link_pattern = r'\[([^\]]*)\]\(([^)]*)\)'
-            links = re.finditer(link_pattern, line)
+            links = _LINK_RE.finditer(line)
             
             for link in links:
                 text, url = link.groups()
-                if not url.strip() or url.strip() in ['url', 'URL', '#', 'javascript:void(0)']:
+                if url.strip() in _PLACEHOLDER_URLS:
                     issues.append({
                         'type': 'error',
                         'message': f'Empty or placeholder link: [{text}]({url})',
@@ -271,34 +335,32 @@ class MarkdownLinter:
         
         return issues
     
-    def check_duplicate_headings(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_duplicate_headings(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check for duplicate heading texts"""
         issues = []
-        lines = content.split('\n')
         headings = {}
         
         for line_num, line in enumerate(lines, 1):
-            if line.strip().startswith('#'):
-                heading_match = re.match(r'^#{1,6}\s+(.+)', line.strip())
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                heading_match = _HEADING_RE.match(stripped)
                 if heading_match:
-                    heading_text = heading_match.group(1).lower().strip()
+                    heading_text = heading_match.group(2).lower().strip()
                     
-                    if heading_text in headings:
+                    first_seen = headings.setdefault(heading_text, line_num)
+                    if first_seen != line_num:
                         issues.append({
                             'type': 'warning',
-                            'message': f'Duplicate heading "{heading_text}" (first seen on line {headings[heading_text]})',
+                            'message': f'Duplicate heading "{heading_text}" (first seen on line {first_seen})',
                             'line': line_num,
                             'rule': 'duplicate_headings'
                         })
-                    else:
-                        headings[heading_text] = line_num
         
         return issues
     
-    def check_list_markers(self, content: str, front_matter_title: str) -> List[dict]:
+    def check_list_markers(self, content: str, lines: List[str], front_matter_title: str) -> List[dict]:
         """Check for consistent list markers"""
         issues = []
-        lines = content.split('\n')
         
         in_list = False
         list_marker = None
@@ -308,7 +370,7 @@ class MarkdownLinter:
             stripped = line.strip()
             
             # Check if this is a list item
-            list_match = re.match(r'^(\s*)([-*+])\s+', line)
+            list_match = _LIST_RE.match(line)
             if list_match:
                 indent, marker = list_match.groups()
                 
@@ -357,39 +419,37 @@ class SpellChecker:
             'async', 'await', 'npm', 'pip', 'cli', 'gui', 'ui', 'ux'
         }
         self.custom_words.update(tech_terms)
+        self._frozen_words = frozenset(self.custom_words)
     
     def add_word(self, word: str):
         """Add word to custom dictionary"""
         self.custom_words.add(word.lower())
+        self._frozen_words = frozenset(self.custom_words)
     
     def is_word_correct(self, word: str) -> bool:
         """Check if word is spelled correctly (basic implementation)"""
-        # Remove punctuation and convert to lowercase
-        clean_word = re.sub(r'[^\w]', '', word.lower())
-        
-        # Skip very short words, numbers, and custom words
-        if len(clean_word) <= 2 or clean_word.isdigit() or clean_word in self.custom_words:
-            return True
-        
-        # This is a basic implementation - in a real app you'd use a proper spell checker
-        # like pyspellchecker, enchant, or integrate with system spell checker
-        return True  # For now, assume all words are correct
+        return _is_word_correct(word, self._frozen_words)
     
     def check_text(self, text: str) -> List[dict]:
         """Check text for spelling errors"""
         errors = []
         lines = text.split('\n')
         
+        in_fence = False
         for line_num, line in enumerate(lines, 1):
-            # Skip code blocks and inline code
-            if '```' in line or line.strip().startswith('    '):
+            # Skip fenced and indented code blocks
+            if line.lstrip().startswith('```'):
+                in_fence = not in_fence
+                continue
+            if in_fence or line.startswith('    '):
                 continue
             
             # Remove inline code
-            line = re.sub(r'`[^`]*`', '', line)
+            if '`' in line:
+                line = _INLINE_CODE_RE.sub('', line)
             
             # Find words
-            words = re.finditer(r'\b[a-zA-Z]+\b', line)
+            words = _WORD_RE.finditer(line)
             
             for word_match in words:
                 word = word_match.group()
@@ -406,14 +466,62 @@ class SpellChecker:
         return errors
 
 
+class LintSignals(QObject):
+    """Signals for LintJob, delivered on the receiver's thread"""
+    finished = Signal(int, list)  # request id, issues sorted by line
+
+
+class LintJob(QRunnable):
+    """Runs the linter and spell checker on a QThreadPool worker"""
+    
+    def __init__(self, request_id: int, linter: MarkdownLinter, spell_checker: SpellChecker,
+                 content: str, front_matter_title: str, max_issues: Optional[int] = None):
+        super().__init__()
+        self.request_id = request_id
+        self.linter = linter
+        self.spell_checker = spell_checker
+        self.content = content
+        self.front_matter_title = front_matter_title
+        self.max_issues = max_issues
+        self.signals = LintSignals()
+    
+    def run(self):
+        # Get linting issues
+        lint_issues = self.linter.lint_document(self.content, self.front_matter_title,
+                                                self.max_issues)
+        
+        # Get spelling issues
+        spell_issues = self.spell_checker.check_text(self.content)
+        
+        # Combine all issues, sorted by line number
+        all_issues = lint_issues + spell_issues
+        all_issues.sort(key=lambda x: x.get('line', 0))
+        
+        self.signals.finished.emit(self.request_id, all_issues)
+
+
 class LintingWidget(QWidget):
     """Widget to display linting results"""
     
+    # Lint rules stop once this many issues have been collected
+    MAX_LINT_ISSUES = 500
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_ui()
         self.linter = MarkdownLinter()
         self.spell_checker = SpellChecker()
+        
+        # Coalesce bursts of check requests (typing) into one lint run
+        self._pending_check = None
+        self._check_timer = QTimer(self)
+        self._check_timer.setSingleShot(True)
+        self._check_timer.setInterval(500)
+        self._check_timer.timeout.connect(self._do_check)
+        
+        # Only the result of the most recent lint job is shown
+        self._lint_request_id = 0
+        self._lint_jobs = {}
     
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -432,27 +540,48 @@ class LintingWidget(QWidget):
         self.summary_label = QLabel("No issues found")
         self.summary_label.setStyleSheet("padding: 8px; color: #4caf50;")
         layout.addWidget(self.summary_label)
+        
+        # Resolve issue icons once instead of per list item
+        style = self.style()
+        self._icon_error = style.standardIcon(QStyle.SP_DialogCancelButton)
+        self._icon_warning = style.standardIcon(QStyle.SP_MessageBoxWarning)
+        self._icon_spelling = style.standardIcon(QStyle.SP_DialogHelpButton)
+        self._icon_info = style.standardIcon(QStyle.SP_MessageBoxInformation)
     
     def check_document(self, content: str, front_matter_title: str = ""):
-        """Check document for issues"""
-        self.issues_list.clear()
-        
-        # Get linting issues
-        lint_issues = self.linter.lint_document(content, front_matter_title)
-        
-        # Get spelling issues
-        spell_issues = self.spell_checker.check_text(content)
-        
-        # Combine all issues
-        all_issues = lint_issues + spell_issues
-        
-        # Sort by line number
-        all_issues.sort(key=lambda x: x.get('line', 0))
-        
+        """Schedule a check of the document; only the latest request runs"""
+        self._pending_check = (content, front_matter_title)
+        self._check_timer.start()
+    
+    def _do_check(self):
+        """Check the most recently requested document for issues"""
+        if self._pending_check is None:
+            return
+        content, front_matter_title = self._pending_check
+        self._pending_check = None
+        
+        # Lint on the thread pool; the result comes back as a queued signal
+        self._lint_request_id += 1
+        job = LintJob(self._lint_request_id, self.linter, self.spell_checker,
+                      content, front_matter_title, self.MAX_LINT_ISSUES)
+        job.signals.finished.connect(self._on_lint_finished)
+        self._lint_jobs[self._lint_request_id] = job
+        QThreadPool.globalInstance().start(job)
+    
+    def _on_lint_finished(self, request_id: int, all_issues: list):
+        """Show issues from the latest lint job; drop superseded results"""
+        self._lint_jobs.pop(request_id, None)
+        if request_id != self._lint_request_id:
+            return
+        self.show_issues(all_issues)
+    
+    def show_issues(self, all_issues: list):
+        """Populate the issues list and summary"""
         # Display issues
         error_count = 0
         warning_count = 0
         info_count = 0
+        items = []
         
         for issue in all_issues:
             issue_type = issue.get('type', 'info')
@@ -465,23 +594,35 @@ class LintingWidget(QWidget):
             
             # Set icon and color based on type
             if issue_type == 'error':
-                item.setIcon(self.style().standardIcon(QStyle.SP_DialogCancelButton))
+                item.setIcon(self._icon_error)
                 item.setForeground(QColor('#f44336'))
                 error_count += 1
             elif issue_type == 'warning':
-                item.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxWarning))
+                item.setIcon(self._icon_warning)
                 item.setForeground(QColor('#ff9800'))
                 warning_count += 1
             elif issue_type == 'spelling':
-                item.setIcon(self.style().standardIcon(QStyle.SP_DialogHelpButton))
+                item.setIcon(self._icon_spelling)
                 item.setForeground(QColor('#9c27b0'))
                 warning_count += 1
             else:  # info
-                item.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxInformation))
+                item.setIcon(self._icon_info)
                 item.setForeground(QColor('#2196f3'))
                 info_count += 1
             
-            self.issues_list.addItem(item)
+            items.append(item)
+        
+        # Swap the list contents with repaints and signals held off
+        issues_list = self.issues_list
+        issues_list.setUpdatesEnabled(False)
+        issues_list.blockSignals(True)
+        try:
+            issues_list.clear()
+            for item in items:
+                issues_list.addItem(item)
+        finally:
+            issues_list.blockSignals(False)
+            issues_list.setUpdatesEnabled(True)
         
         # Update summary
         if all_issues:
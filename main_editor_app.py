@@ -7,6 +7,11 @@ Core window and application setup with perfect sync and no flashing
 import sys
 import os
 import re
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
@@ -14,6 +19,21 @@ from PySide6.QtGui import *
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebChannel import QWebChannel
 import markdown
+from markdown.extensions.toc import slugify
+
+try:
+    import markdown_it
+    from markdown_it import MarkdownIt
+except ImportError:
+    markdown_it = None
+    MarkdownIt = None
+
+# Render cache keys must be stable across sessions for the disk cache
+try:
+    from xxhash import xxh3_64_hexdigest as _hexdigest
+except ImportError:
+    def _hexdigest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
 
 # Import our custom components
 from sidebar_components import SidebarWidget
@@ -21,9 +41,151 @@ from dialog_components import FrontMatterDialog, SettingsDialog
 from document_manager import DocumentManager
 from ui_components import QuickActionsToolbar
 from editor_modes import EditorMode, LintingWidget
+from editor_components import HtmlToMarkdownConverter, MarkdownRenderJob, UPDATE_BLOCKS_JS, split_top_level_blocks
+
+
+logger = logging.getLogger(__name__)
+
+_HEADER_STRIP_RE = re.compile(r'^#+\s*')
+
+# Markdown source highlighting rules, compiled once for every SmoothSyntaxHighlighter
+_HEADER_RE = QRegularExpression(r'^#{1,6}\s.*')
+_BOLD_RE = QRegularExpression(r'\*\*[^*]+\*\*')
+_ITALIC_RE = QRegularExpression(r'\*[^*]+\*')
+_CODE_RE = QRegularExpression(r'`[^`]+`')
+_LINK_RE = QRegularExpression(r'\[[^\]]+\]\([^)]+\)')
+for _pattern in (_HEADER_RE, _BOLD_RE, _ITALIC_RE, _CODE_RE, _LINK_RE):
+    _pattern.optimize()
+del _pattern
+
+# Lines that continue the block above a blank line: indented, quoted or list items
+_CONTINUATION_RE = re.compile(r'[ \t>]|(?:[-*+]|\d+[.)])(?:[ \t]|$)')
+
+# Code fence marker run and whatever follows it on the line
+_FENCE_RE = re.compile(r'(`{3,}|~{3,})(.*)')
+
+# Reference definitions and raw HTML blocks can span or affect other blocks,
+# so documents containing them are rendered whole
+_CROSS_BLOCK_RE = re.compile(r'^ {0,3}(?:\[[^\]]+\]:|<)', re.MULTILINE)
+
+# ATX and setext heading text; python-markdown's toc numbers repeated heading ids document-wide
+_HEADING_TEXT_RE = re.compile(r'^ {0,3}#{1,6}[ \t]+(.*?)[ \t#]*$|^(.+)\n {0,3}(?:=+|-+)[ \t]*$', re.MULTILINE)
+
+# Converter settings used by UltraSmoothPreview.create_markdown_renderer
+_MARKDOWN_EXTENSIONS = ['codehilite', 'tables', 'toc', 'fenced_code']
+_MARKDOWN_EXTENSION_CONFIGS = {'codehilite': {'css_class': 'highlight'}}
+_MARKDOWN_IT_PRESET = 'commonmark'
+_MARKDOWN_IT_OPTIONS = {'html': True}
+_MARKDOWN_IT_RULES = ['table', 'strikethrough']
+
+# Rendered HTML of large documents can persist here across sessions (opt-in setting)
+_DISK_CACHE_DIR = Path.home() / ".cache" / "foxmark" / "md"
+_DISK_CACHE_FILES = 256
+_DISK_CACHE_MIN_CHARS = 20000
+_DISK_CACHE_SETTING = "preview/diskCache"
+
+# Standalone page written by export_to_html
+_HTML_EXPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>
+        {css}
+    </style>
+</head>
+<body>
+    <div class="markdown-body">
+        {body}
+    </div>
+</body>
+</html>"""
+
+
+def _common_affix_lengths(old, new):
+    """Lengths of the shared prefix and (non-overlapping) shared suffix of two sequences"""
+    limit = min(len(old), len(new))
+    
+    # Binary search on slice comparisons keeps the scanning in C
+    low, high = 0, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[:mid] == new[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    prefix = low
+    
+    low, high = 0, limit - prefix
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    return prefix, low
+
+
+def _utf16_len(text: str) -> int:
+    """Length of text in UTF-16 code units, as QTextCursor positions count"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _save_text(file_path: str, text: str):
+    """Write text as UTF-8 via a temporary file that replaces file_path on commit"""
+    file = QSaveFile(file_path)
+    if not file.open(QIODevice.WriteOnly):
+        raise OSError(file.errorString())
+    file.write(text.encode('utf-8'))
+    if not file.commit():
+        raise OSError(file.errorString())
 
 
-class SmoothMarkdownEditor(QTextEdit):
+def _render_config_id() -> str:
+    """Digest of the active converter, its version and settings, for disk cache names"""
+    if MarkdownIt is not None:
+        config = ('markdown-it-py', markdown_it.__version__,
+                  _MARKDOWN_IT_PRESET, _MARKDOWN_IT_OPTIONS, _MARKDOWN_IT_RULES)
+    else:
+        config = ('markdown', markdown.__version__, _MARKDOWN_EXTENSIONS, _MARKDOWN_EXTENSION_CONFIGS)
+    # Bumped by hand when MarkdownBlockRenderer changes its output
+    return _hexdigest(repr((config, 1)).encode('utf-8'))
+
+
+_RENDER_CONFIG_ID = _render_config_id()
+
+
+def _split_markdown_blocks(text: str) -> list:
+    """Split markdown at the blank lines that separate independent top-level blocks"""
+    blocks = []
+    current = []
+    fence = None
+    after_blank = False
+    for line in text.split('\n'):
+        stripped = line.lstrip()
+        if fence is None:
+            if after_blank and stripped and not _CONTINUATION_RE.match(line):
+                blocks.append('\n'.join(current))
+                current = []
+            match = _FENCE_RE.match(stripped)
+            if match:
+                fence = match.group(1)
+        else:
+            # Only a bare run of the same character, at least as long as the opener, closes it
+            match = _FENCE_RE.match(stripped)
+            if (match and match.group(1)[0] == fence[0]
+                    and len(match.group(1)) >= len(fence) and not match.group(2).strip()):
+                fence = None
+        
+        current.append(line)
+        after_blank = fence is None and not stripped
+    
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+
+class SmoothMarkdownEditor(QPlainTextEdit):
     """Ultra-smooth markdown editor with optimized font handling"""
     content_changed = Signal()
     cursor_position_changed = Signal(int)
@@ -34,6 +196,20 @@ class SmoothMarkdownEditor(QTextEdit):
         self.setup_editor()
         self.is_syncing = False
         
+        # Blocks outside the viewport are highlighted in batches after bulk loads
+        self._highlight_next = 0
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.setInterval(0)
+        self._highlight_timer.timeout.connect(self._rehighlight_next_batch)
+        
+        # Per-block statistics, patched from contentsChange for the status bar
+        self._block_words = []
+        self._block_chars = []
+        self._block_filled = []
+        self._block_starts = []
+        self._recount_blocks()
+        self.document().contentsChange.connect(self._on_contents_change)
+        
     def setup_editor(self):
         # Fix font issues by using system fonts only
         try:
@@ -55,7 +231,8 @@ class SmoothMarkdownEditor(QTextEdit):
         self.highlighter = SmoothSyntaxHighlighter(self.document())
         
         # Enable line wrap
-        self.setLineWrapMode(QTextEdit.WidgetWidth)
+        self.setLineWrapMode(QPlainTextEdit.WidgetWidth)
+        self.setCenterOnScroll(False)
         
         # Connect signals
         self.textChanged.connect(self.on_text_changed)
@@ -88,7 +265,7 @@ class SmoothMarkdownEditor(QTextEdit):
         try:
             doc = self.document()
             if line_number < doc.blockCount():
-                block = doc.findBlockByLineNumber(line_number)
+                block = doc.findBlockByNumber(line_number)
                 if block.isValid():
                     cursor = QTextCursor(block)
                     self.setTextCursor(cursor)
@@ -111,1388 +288,1776 @@ class SmoothMarkdownEditor(QTextEdit):
     
     def set_content_silently(self, content: str):
         """Set content without triggering signals"""
+        old_content = self.toPlainText()
+        if old_content == content:
+            return
+        
+        # Replace only the changed middle so unchanged blocks keep their
+        # layout and highlighting, and the user's cursor stays put
+        prefix, suffix = _common_affix_lengths(old_content, content)
+        start = _utf16_len(old_content[:prefix])
+        end = start + _utf16_len(old_content[prefix:len(old_content) - suffix])
+        
         self.is_syncing = True
         try:
-            cursor = self.textCursor()
-            position = cursor.position()
-            
-            self.setPlainText(content)
-            
-            new_cursor = self.textCursor()
-            if position <= len(content):
-                new_cursor.setPosition(position)
-                self.setTextCursor(new_cursor)
+            cursor = QTextCursor(self.document())
+            cursor.beginEditBlock()
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            cursor.insertText(content[prefix:len(content) - suffix])
+            cursor.endEditBlock()
         finally:
             self.is_syncing = False
     
-    # Markdown formatting methods
-    def insert_markdown(self, prefix: str, suffix: str = ""):
-        cursor = self.textCursor()
-        if cursor.hasSelection():
-            selected_text = cursor.selectedText()
-            cursor.insertText(f"{prefix}{selected_text}{suffix}")
-        else:  # WYSIWYG
-            # Show WYSIWYG view
-            self.content_stack.setCurrentIndex(1)
-            
-            # Update WYSIWYG with current editor content and make editable
-            content = self.editor.toPlainText()
-            self.wysiwyg_preview.update_content_smooth(content, editable=True)
-            
-            self.statusBar().showMessage("WYSIWYG Mode - Visual editing", 1500)
-        
-        self.mode_toggle.set_mode(mode)
-        self.run_linting()
-    
-    def switch_to_markdown_mode(self):
-        """Switch to markdown mode with content sync"""
-        if self.current_mode == EditorMode.WYSIWYG:
-            # Get content from WYSIWYG and update editor
-            self.wysiwyg_preview.get_content_as_markdown(self.sync_wysiwyg_to_editor)
-        else:
-            self.set_editor_mode(EditorMode.MARKDOWN)
-    
-    def sync_wysiwyg_to_editor(self, markdown_content):
-        """Sync WYSIWYG content back to editor - THE KEY FIX!"""
-        if markdown_content and not self._syncing:
-            self._syncing = True
-            try:
-                self.editor.set_content_silently(markdown_content)
-                self.is_modified = True
-                self.update_title()
-            finally:
-                self._syncing = False
-        
-        self.set_editor_mode(EditorMode.MARKDOWN)
-    
-    def switch_to_wysiwyg_mode(self):
-        """Switch to WYSIWYG mode"""
-        self.set_editor_mode(EditorMode.WYSIWYG)
-    
-    def on_editor_content_changed(self):
-        """Handle editor content changes"""
-        if self._syncing or self.current_mode != EditorMode.MARKDOWN:
+    def _count_blocks(self, block, count: int):
+        """Statistics for count blocks starting at block"""
+        words, chars, filled = [], [], []
+        for _ in range(count):
+            text = block.text()
+            words.append(len(text.split()))
+            chars.append(len(text))
+            filled.append(not text.isspace() and text != '')
+            block = block.next()
+        return words, chars, filled
+    
+    def _recount_blocks(self):
+        """Rebuild the statistics of every block"""
+        doc = self.document()
+        words, chars, filled = self._count_blocks(doc.firstBlock(), doc.blockCount())
+        self._block_words = words
+        self._block_chars = chars
+        self._block_filled = filled
+        self._block_starts = [filled[i] and (i == 0 or not filled[i - 1]) for i in range(len(filled))]
+    
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        """Recount only the blocks touched by an edit"""
+        doc = self.document()
+        first = doc.findBlock(position)
+        last = doc.findBlock(position + added)
+        if not first.isValid():
+            self._recount_blocks()
             return
-        
-        self.is_modified = True
-        self.update_title()
-        self.update_word_count()
-        
-        # Update preview smoothly
-        content = self.editor.toPlainText()
-        self.preview.update_content_smooth(content, editable=False)
-        
-        # Update outline and linting with delays
-        QTimer.singleShot(100, lambda: self.sidebar.document_outline.update_outline(content))
-        QTimer.singleShot(300, self.run_linting)
-    
-    def on_preview_content_edited(self, markdown_content: str):
-        """Handle markdown preview editing"""
-        if self._syncing or self.current_mode != EditorMode.MARKDOWN:
+        if not last.isValid():
+            last = doc.lastBlock()
+        
+        start = first.blockNumber()
+        new_span = last.blockNumber() - start + 1
+        old_span = new_span - (doc.blockCount() - len(self._block_words))
+        if old_span < 1:
+            self._recount_blocks()
             return
         
-        self._syncing = True
+        words, chars, filled = self._count_blocks(first, new_span)
+        self._block_words[start:start + old_span] = words
+        self._block_chars[start:start + old_span] = chars
+        self._block_filled[start:start + old_span] = filled
+        
+        # A paragraph starts at a filled block after an empty one; the block
+        # following the edited range may change too
+        filled = self._block_filled
+        stop = min(start + new_span + 1, len(filled))
+        self._block_starts[start:start + old_span] = [False] * new_span
+        for i in range(start, stop):
+            self._block_starts[i] = filled[i] and (i == 0 or not filled[i - 1])
+    
+    def _front_matter_blocks(self) -> int:
+        """Number of leading blocks taken by a front matter block, or 0"""
+        block = self.document().firstBlock()
+        if block.text() != '---':
+            return 0
+        block = block.next()
+        while block.isValid():
+            if block.text() == '---':
+                return block.blockNumber() + 1
+            block = block.next()
+        return 0
+    
+    def text_stats(self):
+        """Word, character and paragraph counts below any front matter"""
+        body = self._front_matter_blocks()
+        words = sum(self._block_words[body:])
+        chars = sum(self._block_chars[body:]) + max(0, len(self._block_chars) - body - 1)
+        paragraphs = sum(self._block_starts[body:])
+        if body < len(self._block_filled) and self._block_filled[body] and not self._block_starts[body]:
+            paragraphs += 1  # first body block directly under the closing fence
+        return words, chars, paragraphs
+    
+    def load_content(self, content: str):
+        """Replace the whole text, highlighting the visible blocks first"""
+        self._highlight_timer.stop()
+        self.highlighter.deferred = True
         try:
-            self.editor.set_content_silently(markdown_content)
-            self.is_modified = True
-            self.update_title()
+            self.setPlainText(content)
         finally:
-            QTimer.singleShot(50, lambda: setattr(self, '_syncing', False))
+            self.highlighter.deferred = False
+        QTimer.singleShot(0, self._rehighlight_viewport)
     
-    def on_wysiwyg_content_edited(self, markdown_content: str):
-        """Handle WYSIWYG content editing - CRITICAL FIX!"""
-        if self._syncing or self.current_mode != EditorMode.WYSIWYG:
-            return
+    def _rehighlight_viewport(self):
+        """Highlight the blocks on screen, then queue the rest"""
+        bottom = self.viewport().height()
+        offset = self.contentOffset()
+        block = self.firstVisibleBlock()
         
-        self._syncing = True
+        # Rehighlighting reports a document change; keep it from looking like an edit
+        self.is_syncing = True
         try:
-            # Update the underlying editor content
-            self.editor.set_content_silently(markdown_content)
-            self.is_modified = True
-            self.update_title()
-            self.update_word_count()
+            while block.isValid():
+                self.highlighter.rehighlightBlock(block)
+                if self.blockBoundingGeometry(block).translated(offset).bottom() > bottom:
+                    break
+                block = block.next()
         finally:
-            QTimer.singleShot(50, lambda: setattr(self, '_syncing', False))
-    
-    def on_editor_cursor_changed(self, line_number: int):
-        """Handle cursor changes"""
-        if not self._syncing and self.current_mode == EditorMode.MARKDOWN:
-            self.preview.scroll_to_line(line_number)
-    
-    def on_editor_scroll_changed(self, ratio: float):
-        """Handle scroll changes"""
-        if not self._syncing and self.current_mode == EditorMode.MARKDOWN:
-            self.preview.sync_scroll_position(ratio)
+            self.is_syncing = False
+        
+        self._highlight_next = 0
+        self._highlight_timer.start()
     
-    def sync_editor_scroll(self, ratio: float):
-        """Sync editor scroll from preview"""
-        if not self._syncing and self.current_mode == EditorMode.MARKDOWN:
-            self.editor.sync_scroll_position(ratio)
+    def _rehighlight_next_batch(self):
+        """Highlight the next batch of blocks without blocking the UI"""
+        block = self.document().findBlockByNumber(self._highlight_next)
+        self.is_syncing = True
+        try:
+            for _ in range(200):
+                if not block.isValid():
+                    self._highlight_timer.stop()
+                    return
+                self.highlighter.rehighlightBlock(block)
+                block = block.next()
+        finally:
+            self.is_syncing = False
+        self._highlight_next = block.blockNumber() if block.isValid() else self.document().blockCount()
     
-    def goto_line_from_issue(self, line_number: int):
-        """Go to line from linting issue"""
-        if self.current_mode == EditorMode.WYSIWYG:
-            self.switch_to_markdown_mode()
-            QTimer.singleShot(200, lambda: self._goto_line_actual(line_number))
+    # Markdown formatting methods
+    def insert_markdown(self, prefix: str, suffix: str = ""):
+        cursor = self.textCursor()
+        cursor.beginEditBlock()
+        if cursor.hasSelection():
+            cursor.insertText(f"{prefix}{cursor.selectedText()}{suffix}")
         else:
-            self._goto_line_actual(line_number)
+            # Insert a placeholder and select it
+            start = cursor.position() + _utf16_len(prefix)
+            cursor.insertText(f"{prefix}text{suffix}")
+            cursor.setPosition(start)
+            cursor.setPosition(start + 4, QTextCursor.KeepAnchor)
+        cursor.endEditBlock()
+        self.setTextCursor(cursor)
     
-    def _goto_line_actual(self, line_number: int):
-        """Actually navigate to line"""
-        self.editor.goto_line(line_number - 1)
-        self.editor.setFocus()
-        QTimer.singleShot(100, lambda: self.preview.scroll_to_line(line_number - 1))
+    def insert_header(self, level: int):
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.StartOfLine)
+        current_line = cursor.block().text()
+        clean_line = _HEADER_STRIP_RE.sub('', current_line)
+        header_text = f"{'#' * level} {clean_line}" if clean_line else f"{'#' * level} Header {level}"
+        cursor.select(QTextCursor.LineUnderCursor)
+        cursor.insertText(header_text)
     
-    def goto_heading(self, line_number: int):
-        """Navigate to heading"""
-        self.editor.goto_line(line_number)
-        QTimer.singleShot(100, lambda: self.preview.scroll_to_line(line_number))
-        self.editor.setFocus()
+    def insert_table(self):
+        table_template = """| Column 1 | Column 2 | Column 3 |
+|----------|----------|----------|
+| Cell 1   | Cell 2   | Cell 3   |
+| Cell 4   | Cell 5   | Cell 6   |
+"""
+        cursor = self.textCursor()
+        cursor.insertText(table_template)
     
-    def open_file_from_explorer(self, file_path: str):
-        self.open_file(file_path)
+    def insert_link(self):
+        cursor = self.textCursor()
+        if cursor.hasSelection():
+            selected_text = cursor.selectedText()
+            cursor.insertText(f"[{selected_text}](url)")
+        else:
+            cursor.insertText("[link text](url)")
     
-    def run_linting(self):
-        """Run document linting"""
-        content = self.editor.toPlainText()
-        front_matter_title = getattr(self.document_manager.metadata, 'title', '')
-        QTimer.singleShot(50, lambda: self.linting_widget.check_document(content, front_matter_title))
+    def insert_image(self):
+        cursor = self.textCursor()
+        cursor.insertText("![alt text](image_url)")
+
+
+class SmoothSyntaxHighlighter(QSyntaxHighlighter):
+    """Optimized syntax highlighter"""
     
-    # Menu and toolbar setup
-    def setup_menu(self):
-        menubar = self.menuBar()
-        
-        # File menu
-        file_menu = menubar.addMenu('File')
+    _SPAN_CACHE_SIZE = 4096
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.highlighting_rules = []
         
-        new_action = QAction('New', self)
-        new_action.setShortcut('Ctrl+N')
-        new_action.triggered.connect(self.new_file)
-        file_menu.addAction(new_action)
+        # Line text -> (start, length, format) spans from the rules below
+        self._span_cache = {}
         
-        open_action = QAction('Open...', self)
-        open_action.setShortcut('Ctrl+O')
-        open_action.triggered.connect(self.open_file)
-        file_menu.addAction(open_action)
+        # Set while a bulk load is in progress; see SmoothMarkdownEditor.load_content
+        self.deferred = False
         
-        file_menu.addSeparator()
+        colors = {
+            'header': QColor('#58a6ff'),
+            'bold': QColor('#ffa657'),
+            'italic': QColor('#a5d6ff'),
+            'code': QColor('#f47067'),
+            'link': QColor('#7ee787'),
+        }
         
-        save_action = QAction('Save', self)
-        save_action.setShortcut('Ctrl+S')
-        save_action.triggered.connect(self.save_file)
-        file_menu.addAction(save_action)
+        # Headers
+        header_format = QTextCharFormat()
+        header_format.setForeground(colors['header'])
+        header_format.setFontWeight(QFont.Bold)
+        self.highlighting_rules.append((_HEADER_RE, header_format))
         
-        save_as_action = QAction('Save As...', self)
-        save_as_action.setShortcut('Ctrl+Shift+S')
-        save_action.triggered.connect(self.save_file_as)
-        file_menu.addAction(save_as_action)
+        # Bold
+        bold_format = QTextCharFormat()
+        bold_format.setForeground(colors['bold'])
+        bold_format.setFontWeight(QFont.Bold)
+        self.highlighting_rules.append((_BOLD_RE, bold_format))
         
-        file_menu.addSeparator()
+        # Italic
+        italic_format = QTextCharFormat()
+        italic_format.setForeground(colors['italic'])
+        italic_format.setFontItalic(True)
+        self.highlighting_rules.append((_ITALIC_RE, italic_format))
         
-        # Document properties
-        properties_action = QAction('Document Properties...', self)
-        properties_action.setShortcut('Ctrl+Alt+P')
-        properties_action.triggered.connect(self.edit_document_properties)
-        file_menu.addAction(properties_action)
+        # Code
+        code_format = QTextCharFormat()
+        code_format.setForeground(colors['code'])
+        self.highlighting_rules.append((_CODE_RE, code_format))
         
-        file_menu.addSeparator()
+        # Links
+        link_format = QTextCharFormat()
+        link_format.setForeground(colors['link'])
+        self.highlighting_rules.append((_LINK_RE, link_format))
+    
+    def highlightBlock(self, text):
+        if self.deferred:
+            return
         
-        # Export submenu
-        export_menu = file_menu.addMenu('Export')
+        # Qt only calls this for blocks touched by an edit; repeated lines replay cached spans
+        spans = self._span_cache.get(text)
+        if spans is None:
+            spans = []
+            for pattern, format in self.highlighting_rules:
+                iterator = pattern.globalMatch(text)
+                while iterator.hasNext():
+                    match = iterator.next()
+                    spans.append((match.capturedStart(), match.capturedLength(), format))
+            
+            if len(self._span_cache) >= self._SPAN_CACHE_SIZE:
+                self._span_cache.clear()
+            spans = self._span_cache[text] = tuple(spans)
         
-        formats = ['HTML', 'PDF', 'DOCX', 'ODT', 'EPUB', 'LaTeX']
-        for fmt in formats:
-            action = QAction(f'Export as {fmt}...', self)
-            action.triggered.connect(lambda checked, f=fmt: self.export_file(f))
-            export_menu.addAction(action)
+        for start, length, format in spans:
+            self.setFormat(start, length, format)
+
+
+class MarkdownBlockRenderer:
+    """Renders markdown block by block, reusing the HTML of blocks that did not change"""
+    
+    def __init__(self, render, heading_ids: bool = False):
+        self._render = render
+        # Set when render adds heading ids and fills [TOC] markers (python-markdown's toc)
+        self._heading_ids = heading_ids
+        self._blocks = {}
+    
+    def _needs_whole_document(self, markdown_text: str) -> bool:
+        """Whether some construct in markdown_text depends on other blocks"""
+        if _CROSS_BLOCK_RE.search(markdown_text):
+            return True
+        if not self._heading_ids:
+            return False
+        if '[TOC]' in markdown_text:
+            return True
+        
+        # Repeated heading ids are numbered across the document, so block renders would collide
+        slugs = [slugify(atx or setext, '-') for atx, setext in _HEADING_TEXT_RE.findall(markdown_text)]
+        return len(slugs) != len(set(slugs))
+    
+    def __call__(self, markdown_text: str) -> str:
+        if self._needs_whole_document(markdown_text):
+            return self._render(markdown_text)
+        
+        # Only blocks of the latest text are kept, so the cache follows the document
+        previous, blocks = self._blocks, {}
+        parts = []
+        for block in _split_markdown_blocks(markdown_text):
+            html_content = blocks.get(block) or previous.get(block)
+            if html_content is None:
+                html_content = self._render(block)
+            blocks[block] = html_content
+            parts.append(html_content)
+        
+        self._blocks = blocks
+        return '\n'.join(parts)
+
+
+class UltraSmoothPreview(QWebEngineView):
+    """Ultra-smooth preview with NO flashing"""
+    scroll_sync_requested = Signal(float)
+    content_edited = Signal(str)
+    cursor_sync_requested = Signal(int)
+    
+    # Rendered HTML shared by every preview, keyed by a digest of the markdown
+    _html_cache = OrderedDict()
+    _HTML_CACHE_SIZE = 128
+    
+    # Whether large renders are also kept in _DISK_CACHE_DIR; see EnhancedMainWindow.set_preview_disk_cache
+    disk_cache_enabled = False
+    # Workers of every preview share the write counter and the prune
+    _disk_cache_lock = threading.Lock()
+    _disk_cache_writes = 0
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Whole-document conversion for exports
+        self.render_markdown = self.create_markdown_renderer(by_block=False)
         
-        # View menu
-        view_menu = menubar.addMenu('View')
+        # Background renders use their own renderer; one job runs at a time
+        self._background_render = self.create_markdown_renderer()
+        self._render_epoch = 0
+        self._render_job = None
+        self._render_key = None
+        self._render_editable = False
+        self._queued_render = None
         
-        markdown_mode_action = QAction('Markdown Mode', self)
-        markdown_mode_action.setShortcut('Ctrl+1')
-        markdown_mode_action.triggered.connect(self.switch_to_markdown_mode)
-        view_menu.addAction(markdown_mode_action)
+        # Top-level blocks of the last non-editable render, for patching; see _apply_html
+        self._prev_blocks = None
+        self._shown_html = None
+        self.loadFinished.connect(self._on_load_finished)
         
-        wysiwyg_mode_action = QAction('WYSIWYG Mode', self)
-        wysiwyg_mode_action.setShortcut('Ctrl+2')
-        wysiwyg_mode_action.triggered.connect(self.switch_to_wysiwyg_mode)
-        view_menu.addAction(wysiwyg_mode_action)
+        self._html_converter = HtmlToMarkdownConverter()
         
-        view_menu.addSeparator()
+        # Bridge for communication
+        self.channel = QWebChannel()
+        self.page().setWebChannel(self.channel)
+        self.bridge = PreviewBridge()
+        self.channel.registerObject("bridge", self.bridge)
         
-        toggle_sidebar_action = QAction('Toggle Sidebar', self)
-        toggle_sidebar_action.setShortcut('Ctrl+\\')
-        toggle_sidebar_action.triggered.connect(self.toggle_sidebar)
-        view_menu.addAction(toggle_sidebar_action)
+        # Connect signals
+        self.bridge.scroll_changed.connect(self.scroll_sync_requested.emit)
+        self.bridge.content_changed.connect(self.on_content_edited)
         
-        focus_mode_action = QAction('Focus Mode', self)
-        focus_mode_action.setShortcut('F11')
-        focus_mode_action.triggered.connect(self.toggle_focus_mode)
-        view_menu.addAction(focus_mode_action)
+        # Prevent flashing variables
+        self._current_content = ""
+        self._is_updating = False
+        self._content_hash = ""
         
-        # Tools menu
-        tools_menu = menubar.addMenu('Tools')
+        # Initialize with empty content
+        self.set_initial_content()
+    
+    def set_initial_content(self):
+        """Set initial HTML structure"""
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+            <style>{self._CSS}</style>
+        </head>
+        <body>
+            <div id="content" class="markdown-body"></div>
+            <script>{UPDATE_BLOCKS_JS}</script>
+            <script>{self._JS}</script>
+        </body>
+        </html>
+        """
+        self.setHtml(html)
+    
+    @staticmethod
+    def create_markdown_renderer(by_block: bool = True):
+        """Markdown to HTML callable, using markdown-it-py when it is installed"""
+        if MarkdownIt is not None:
+            render = MarkdownIt(_MARKDOWN_IT_PRESET, _MARKDOWN_IT_OPTIONS).enable(_MARKDOWN_IT_RULES).render
+        else:
+            # toc stays for the heading ids that in-page links and exports rely on
+            processor = markdown.Markdown(
+                extensions=_MARKDOWN_EXTENSIONS,
+                extension_configs=_MARKDOWN_EXTENSION_CONFIGS
+            )
+            
+            def render(markdown_text):
+                # Reference links and stashed HTML would otherwise carry over between calls
+                return processor.reset().convert(markdown_text)
         
-        settings_action = QAction('Settings...', self)
-        settings_action.triggered.connect(self.show_settings)
-        tools_menu.addAction(settings_action)
+        if not by_block:
+            return render
+        
+        # Unchanged blocks keep identical HTML, which also keeps _patch_content_html small
+        return MarkdownBlockRenderer(render, heading_ids=MarkdownIt is None)
     
-    def setup_toolbar(self):
-        self.toolbar = QuickActionsToolbar(self)
-        self.addToolBar(self.toolbar)
+    def update_content_smooth(self, markdown_text: str, editable: bool = False):
+        """Update content without flashing - key optimization!"""
+        # One digest skips unchanged content and keys both render caches
+        key = self._cache_key(markdown_text)
+        if key == self._content_hash:
+            return
+        
+        self._content_hash = key
+        self._render_epoch += 1
+        
+        # Cache hits are applied at once; misses render on the thread pool
+        html_content = self._lookup_html(key)
+        if html_content is not None:
+            self._queued_render = None
+            self._apply_html(html_content, editable)
+        elif self._render_job is not None:
+            self._queued_render = (markdown_text, editable, key)
+        else:
+            self._start_render(markdown_text, editable, key)
     
-    def setup_statusbar(self):
-        status_bar = self.statusBar()
+    def _start_render(self, markdown_text: str, editable: bool, key: str):
+        """Convert markdown_text on a QThreadPool worker"""
+        job = MarkdownRenderJob(
+            self._render_epoch, markdown_text,
+            lambda text: self._convert_with_disk_cache(text, key)
+        )
+        job.signals.finished.connect(self._on_render_finished)
+        job.signals.failed.connect(self._on_render_failed)
+        self._render_job = job
+        self._render_key = key
+        self._render_editable = editable
+        QThreadPool.globalInstance().start(job)
+    
+    def _convert_with_disk_cache(self, markdown_text: str, key: str) -> str:
+        """Background conversion that reuses HTML saved by earlier sessions for large documents"""
+        if not self.disk_cache_enabled or len(markdown_text) < _DISK_CACHE_MIN_CHARS:
+            return self._background_render(markdown_text)
+        
+        # Converter and settings are part of the name, so changing them never serves stale HTML
+        cache_file = _DISK_CACHE_DIR / f"{_RENDER_CONFIG_ID}-{key}.html"
+        try:
+            return cache_file.read_text(encoding='utf-8')
+        except OSError:
+            pass
         
-        self.word_count_label = QLabel("Words: 0")
-        status_bar.addPermanentWidget(self.word_count_label)
+        html_content = self._background_render(markdown_text)
+        try:
+            _DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # Readers in other workers or sessions only ever see a complete file
+            _save_text(str(cache_file), html_content)
+            
+            # Scan the directory on the first write of a session and every _DISK_CACHE_FILES after
+            cls = type(self)
+            with cls._disk_cache_lock:
+                if cls._disk_cache_writes % _DISK_CACHE_FILES == 0:
+                    self._prune_disk_cache()
+                cls._disk_cache_writes += 1
+        except OSError as e:
+            logger.warning("Error writing preview cache: %s", e)
+        return html_content
+    
+    @staticmethod
+    def _prune_disk_cache():
+        """Delete all but the newest _DISK_CACHE_FILES cached renders"""
+        files = sorted(_DISK_CACHE_DIR.glob("*.html"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in files[_DISK_CACHE_FILES:]:
+            path.unlink(missing_ok=True)
+    
+    def _on_render_finished(self, epoch: int, html_content: str):
+        """Cache a finished render and show it unless newer text arrived"""
+        self._render_job = None
+        self._remember_html(self._render_key, html_content)
+        if epoch == self._render_epoch:
+            self._apply_html(html_content, self._render_editable)
+        self._start_queued_render()
+    
+    def _on_render_failed(self, epoch: int, error: str):
+        self._render_job = None
+        logger.warning("Preview update error: %s", error)
+        self._start_queued_render()
+    
+    def _start_queued_render(self):
+        if self._queued_render is not None:
+            markdown_text, editable, key = self._queued_render
+            self._queued_render = None
+            self._start_render(markdown_text, editable, key)
+    
+    def _apply_html(self, html_content: str, editable: bool):
+        """Show rendered HTML, replacing only the blocks that changed when possible"""
+        self._is_updating = True
         
-        self.cursor_position_label = QLabel("Line: 1, Col: 1")
-        status_bar.addPermanentWidget(self.cursor_position_label)
+        try:
+            previous = self._prev_blocks
+            # Edits made in an editable page are not tracked here, so those always get a full swap
+            blocks = None if editable else split_top_level_blocks(html_content)
+            self._prev_blocks = blocks
+            self._shown_html = (html_content, editable)
+            
+            if previous is None or blocks is None:
+                self._set_content_html(html_content, editable)
+            else:
+                self._patch_content_html(previous, blocks)
+            
+        except Exception as e:
+            logger.warning("Preview update error: %s", e)
+        finally:
+            # Reset flag after short delay
+            QTimer.singleShot(50, lambda: setattr(self, '_is_updating', False))
+    
+    def _patch_content_html(self, previous: list, blocks: list):
+        """Send the run of top-level blocks that differs from the last render"""
+        prefix, suffix = _common_affix_lengths(previous, blocks)
+        if prefix == len(previous) == len(blocks):
+            return
         
-        # Connect cursor position updates
-        self.editor.cursorPositionChanged.connect(self.update_cursor_position)
+        patch = {
+            'start': prefix,
+            'remove': len(previous) - prefix - suffix,
+            'blocks': blocks[prefix:len(blocks) - suffix],
+            'before': len(previous),
+            'after': len(blocks),
+        }
+        self.page().runJavaScript(f"updateBlocks({json.dumps(patch)});", self._on_patch_applied)
+    
+    def _on_patch_applied(self, ok):
+        """Replace the whole body when the page's blocks no longer line up with ours"""
+        # The browser may split or merge malformed HTML differently from split_top_level_blocks
+        if ok is False and self._shown_html is not None:
+            html_content, editable = self._shown_html
+            self._prev_blocks = None if editable else split_top_level_blocks(html_content)
+            self._set_content_html(html_content, editable)
+    
+    def _on_load_finished(self, ok: bool):
+        """Scripts sent before the page loaded were lost; show the latest render again"""
+        if ok and self._shown_html is not None:
+            self._prev_blocks = None
+            self._apply_html(*self._shown_html)
+    
+    def _set_content_html(self, html_content: str, editable: bool):
+        """Replace the whole rendered body"""
+        # Use JavaScript to update content smoothly; json.dumps yields a valid JS string literal
+        js_code = f"""
+        var content = document.getElementById('content');
+        if (content) {{
+            var scrollTop = window.pageYOffset;
+            content.innerHTML = {json.dumps(html_content)};
+            content.contentEditable = '{str(editable).lower()}';
+            window.scrollTo(0, scrollTop);
+            if ({str(editable).lower()}) {{
+                setupEditingHandlers();
+            }}
+        }}
+        """
+        
+        self.page().runJavaScript(js_code)
     
-    def apply_theme(self):
-        """Apply dark theme"""
-        self.setStyleSheet("""
-        QMainWindow {
-            background-color: #0d1117;
+    @staticmethod
+    def _cache_key(markdown_text: str) -> str:
+        return _hexdigest(markdown_text.encode('utf-8', 'surrogatepass'))
+    
+    def _lookup_html(self, key: str):
+        html_content = self._html_cache.get(key)
+        if html_content is not None:
+            self._html_cache.move_to_end(key)
+        return html_content
+    
+    def _remember_html(self, key: str, html_content: str):
+        cache = self._html_cache
+        cache[key] = html_content
+        if len(cache) > self._HTML_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def render_html(self, markdown_text: str) -> str:
+        """Convert the whole document to HTML, e.g. for export"""
+        # Not served from the preview cache, whose entries come from block-by-block renders
+        return self.render_markdown(markdown_text)
+    
+    @classmethod
+    def clear_html_cache(cls):
+        """Drop cached renders, e.g. when another document is loaded"""
+        cls._html_cache.clear()
+    
+    def on_content_edited(self, html_content: str):
+        """Handle content editing in WYSIWYG mode"""
+        if self._is_updating:
+            return
+        
+        # Convert HTML back to markdown
+        markdown_content = self.html_to_markdown(html_content)
+        self.content_edited.emit(markdown_content)
+    
+    def html_to_markdown(self, html: str) -> str:
+        """Convert HTML back to Markdown in a single tokenizing pass"""
+        return self._html_converter.convert(html)
+    
+    def set_editable(self, editable: bool):
+        """Set content editable state"""
+        js_code = f"""
+        var content = document.getElementById('content');
+        if (content) {{
+            content.contentEditable = '{str(editable).lower()}';
+            if ({str(editable).lower()}) {{
+                content.style.cursor = 'text';
+                setupEditingHandlers();
+            }} else {{
+                content.style.cursor = 'default';
+            }}
+        }}
+        """
+        self.page().runJavaScript(js_code)
+    
+    def get_content_as_markdown(self, callback):
+        """Get current content as markdown"""
+        def handle_html(html_content):
+            if html_content:
+                markdown_content = self.html_to_markdown(html_content)
+                callback(markdown_content)
+            else:
+                callback("")
+        
+        self.page().runJavaScript("document.getElementById('content').innerHTML", handle_html)
+    
+    def scroll_to_line(self, line_number: int):
+        """Scroll to specific line"""
+        js_code = f"""
+        var elements = document.querySelectorAll('h1, h2, h3, h4, h5, h6, p, li, pre, blockquote');
+        if (elements.length > {line_number} && elements[{line_number}]) {{
+            elements[{line_number}].scrollIntoView({{ behavior: 'smooth', block: 'center' }});
+        }}
+        """
+        self.page().runJavaScript(js_code)
+    
+    def sync_scroll_position(self, ratio: float):
+        """Sync scroll position"""
+        js_code = f"""
+        var maxScroll = Math.max(0, document.documentElement.scrollHeight - window.innerHeight);
+        window.scrollTo(0, {ratio} * maxScroll);
+        """
+        self.page().runJavaScript(js_code)
+    
+    # Page stylesheet and script, built once when the class is defined
+    _CSS = """
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
+            line-height: 1.6;
             color: #e1e4e8;
+            background-color: #0d1117;
+            margin: 0;
+            padding: 20px;
+            transition: none !important;
         }
         
-        QWidget {
-            background-color: #0d1117;
-            color: #e1e4e8;
+        .markdown-body {
+            max-width: none;
+            transition: none !important;
         }
         
-        QTabWidget::pane {
-            border: 1px solid #30363d;
-            background-color: #161b22;
+        .markdown-body * {
+            transition: none !important;
         }
         
-        QTabBar::tab {
-            background-color: #21262d;
-            color: #e1e4e8;
-            padding: 8px 12px;
-            margin-right: 2px;
-            border-top-left-radius: 4px;
-            border-top-right-radius: 4px;
+        h1, h2, h3, h4, h5, h6 {
+            color: #58a6ff;
+            margin-top: 24px;
+            margin-bottom: 16px;
+            font-weight: 600;
+            line-height: 1.25;
         }
         
-        QTabBar::tab:selected {
+        h1 { font-size: 2em; }
+        h2 { font-size: 1.5em; }
+        h3 { font-size: 1.25em; }
+        
+        p { margin-bottom: 16px; }
+        
+        code {
+            padding: 2px 4px;
+            font-size: 85%;
             background-color: #161b22;
+            border-radius: 3px;
+            color: #f47067;
         }
         
-        QTreeWidget, QListWidget {
+        pre {
+            padding: 16px;
             background-color: #161b22;
-            border: none;
-            color: #e1e4e8;
+            border-radius: 6px;
+            overflow-x: auto;
         }
         
-        QTreeWidget::item, QListWidget::item {
-            padding: 6px;
-            border-bottom: 1px solid #21262d;
+        blockquote {
+            padding: 0 16px;
+            color: #8b949e;
+            border-left: 4px solid #30363d;
+            margin: 0 0 16px 0;
         }
         
-        QTreeWidget::item:selected, QListWidget::item:selected {
-            background-color: #264f78;
+        table {
+            border-collapse: collapse;
+            margin-bottom: 16px;
+            width: 100%;
         }
         
-        QTreeWidget::item:hover, QListWidget::item:hover {
-            background-color: #30363d;
-        }
-        
-        QTextEdit {
-            background-color: #0d1117;
-            color: #e1e4e8;
-            border: none;
-            selection-background-color: #264f78;
-        }
-        
-        QSplitter::handle {
-            background-color: #21262d;
-            width: 2px;
-        }
-        
-        QSplitter::handle:hover {
-            background-color: #30363d;
+        table th, table td {
+            padding: 6px 13px;
+            border: 1px solid #30363d;
         }
         
-        QStatusBar {
+        table th {
             background-color: #161b22;
-            color: #8b949e;
-            border-top: 1px solid #30363d;
-        }
-        
-        QStackedWidget {
-            background-color: #0d1117;
+            font-weight: 600;
         }
         
-        QToolBar {
-            background-color: #161b22;
-            border-bottom: 1px solid #30363d;
-            spacing: 4px;
+        ul, ol {
+            padding-left: 30px;
+            margin-bottom: 16px;
         }
         
-        QToolBar QToolButton {
-            background-color: #21262d;
-            color: #e1e4e8;
-            border: 1px solid #30363d;
-            border-radius: 4px;
-            padding: 6px 12px;
-            font-weight: bold;
-        }
+        li { margin-bottom: 4px; }
         
-        QToolBar QToolButton:hover {
-            background-color: #30363d;
+        a {
+            color: #7ee787;
+            text-decoration: none;
         }
         
-        QToolBar QToolButton:pressed {
-            background-color: #264f78;
-        }
+        a:hover { text-decoration: underline; }
         
-        QMenuBar {
-            background-color: #161b22;
-            color: #e1e4e8;
-            border-bottom: 1px solid #30363d;
-            padding: 4px;
-        }
+        strong { color: #ffa657; }
+        em { color: #a5d6ff; }
         
-        QMenuBar::item {
-            background: transparent;
-            padding: 8px 12px;
+        [contenteditable="true"]:focus {
+            outline: 2px solid #58a6ff;
+            outline-offset: 2px;
             border-radius: 4px;
         }
+        """
+    
+    _JS = """
+        var bridge;
+        var isEditing = false;
         
-        QMenuBar::item:selected {
-            background-color: #21262d;
-        }
-        
-        QMenu {
-            background-color: #161b22;
-            color: #e1e4e8;
-            border: 1px solid #30363d;
-            border-radius: 6px;
-        }
-        
-        QMenu::item {
-            padding: 8px 20px;
-        }
+        new QWebChannel(qt.webChannelTransport, function(channel) {
+            bridge = channel.objects.bridge;
+            setupEditingHandlers();
+        });
         
-        QMenu::item:selected {
-            background-color: #21262d;
+        function setupEditingHandlers() {
+            var content = document.getElementById('content');
+            if (!content || isEditing) return;
+            
+            isEditing = true;
+            
+            // Content editing
+            content.addEventListener('input', function() {
+                if (bridge && bridge.on_content_changed) {
+                    bridge.on_content_changed(content.innerHTML);
+                }
+            });
+            
+            // Paste handling
+            content.addEventListener('paste', function(e) {
+                e.preventDefault();
+                var text = (e.originalEvent || e).clipboardData.getData('text/plain');
+                document.execCommand('insertText', false, text);
+            });
+            
+            // Scroll sync
+            var scrollTimeout;
+            window.addEventListener('scroll', function() {
+                clearTimeout(scrollTimeout);
+                scrollTimeout = setTimeout(function() {
+                    var scrollTop = window.pageYOffset;
+                    var scrollHeight = Math.max(0, document.documentElement.scrollHeight - window.innerHeight);
+                    var ratio = scrollHeight > 0 ? scrollTop / scrollHeight : 0;
+                    
+                    if (bridge && bridge.on_scroll_changed) {
+                        bridge.on_scroll_changed(ratio);
+                    }
+                }, 10);
+            });
         }
-        """)
+        """
     
-    # File operations
-    def new_file(self):
-        if self.check_save_changes():
-            self.editor.clear()
-            self.current_file = None
-            self.is_modified = False
-            self.document_manager.metadata = self.document_manager.create_empty_metadata()
-            self.update_title()
+    def get_css(self):
+        return self._CSS
     
-    def open_file(self, file_path: str = None):
-        if self.check_save_changes():
-            if not file_path:
-                file_path, _ = QFileDialog.getOpenFileName(
-                    self, "Open Markdown File", "",
-                    "Markdown files (*.md *.markdown *.txt);;All files (*)"
-                )
-            
-            if file_path:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        content = file.read()
-                        
-                        metadata, markdown_content = self.document_manager.parse_front_matter(content)
-                        self.document_manager.metadata = metadata
-                        
-                        self.editor.setPlainText(content)
-                        self.current_file = file_path
-                        self.is_modified = False
-                        self.update_title()
-                        
-                        file_dir = Path(file_path).parent
-                        self.sidebar.file_explorer.load_directory(file_dir)
-                        
-                except Exception as e:
-                    QMessageBox.warning(self, "Error", f"Could not open file:\n{str(e)}")
+    def get_javascript(self):
+        return self._JS
+
+
+class PreviewBridge(QObject):
+    """Bridge for web communication"""
+    scroll_changed = Signal(float)
+    content_changed = Signal(str)
     
-    def save_file(self):
-        if self.current_file:
-            self.save_to_file(self.current_file)
-        else:
-            self.save_file_as()
+    @Slot(float)
+    def on_scroll_changed(self, ratio):
+        self.scroll_changed.emit(ratio)
     
-    def save_file_as(self):
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Markdown File", "",
-            "Markdown files (*.md);;All files (*)"
-        )
-        
-        if file_path:
-            self.save_to_file(file_path)
-            self.current_file = file_path
-            self.update_title()
+    @Slot(str)
+    def on_content_changed(self, content):
+        self.content_changed.emit(content)
+
+
+class OptimizedModeToggle(QWidget):
+    """Clean mode toggle"""
+    mode_changed = Signal(EditorMode)
     
-    def save_to_file(self, file_path: str):
-        try:
-            content = self.editor.toPlainText()
-            
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
-                self.is_modified = False
-                self.update_title()
-                self.statusBar().showMessage("File saved successfully", 2000)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Could not save file:\n{str(e)}")
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.current_mode = EditorMode.MARKDOWN
+        self.setup_ui()
     
-    def export_file(self, format_type: str):
-        """Export file using basic conversion"""
-        if not self.current_file:
-            QMessageBox.warning(self, "Export Error", "Please save the file first.")
-            return
+    def setup_ui(self):
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(8, 4, 8, 4)
         
-        # Get export file path
-        extensions = {
-            'HTML': 'html',
-            'PDF': 'pdf', 
-            'DOCX': 'docx',
-            'ODT': 'odt',
-            'EPUB': 'epub',
-            'LaTeX': 'tex'
-        }
+        self.mode_label = QLabel("📝 Markdown Mode")
+        self.mode_label.setStyleSheet("""
+            QLabel {
+                background-color: #0969da;
+                color: white;
+                padding: 6px 12px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+        """)
+        layout.addWidget(self.mode_label)
         
-        ext = extensions.get(format_type, 'html')
-        default_name = Path(self.current_file).stem + f'.{ext}'
+        self.switch_button = QPushButton("Switch to WYSIWYG")
+        self.switch_button.setStyleSheet("""
+            QPushButton {
+                background-color: #21262d;
+                color: #e1e4e8;
+                border: 1px solid #30363d;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover { background-color: #30363d; }
+        """)
+        self.switch_button.clicked.connect(self.toggle_mode)
+        layout.addWidget(self.switch_button)
         
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, 
-            f"Export as {format_type}", 
-            default_name,
-            f"{format_type} files (*.{ext});;All files (*)"
-        )
+        layout.addStretch()
         
-        if file_path:
-            if format_type == 'HTML':
-                self.export_to_html(file_path)
-            else:
-                QMessageBox.information(
-                    self, "Export", 
-                    f"{format_type} export requires Pandoc installation.\n"
-                    "Please install Pandoc for advanced export features."
-                )
+        help_text = QLabel("Ctrl+1: Markdown | Ctrl+2: WYSIWYG")
+        help_text.setStyleSheet("color: #8b949e; font-size: 11px;")
+        layout.addWidget(help_text)
     
-    def export_to_html(self, file_path: str):
-        """Export to HTML using built-in markdown processor"""
-        try:
-            content = self.editor.toPlainText()
-            
-            # Remove front matter for export
-            if content.startswith('---'):
-                parts = content.split('---', 2)
-                if len(parts) >= 3:
-                    content = parts[2].lstrip('\n')
-            
-            # Convert to HTML
-            html_content = self.preview.markdown_processor.convert(content)
-            
-            # Create full HTML document
-            full_html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{self.document_manager.metadata.title or 'Exported Document'}</title>
-    <style>
-        {self.preview.get_css()}
-    </style>
-</head>
-<body>
-    <div class="markdown-body">
-        {html_content}
-    </div>
-</body>
-</html>"""
-            
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(full_html)
-            
-            self.statusBar().showMessage("Exported to HTML successfully", 3000)
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Export Error", f"Could not export file:\n{str(e)}")
-    
-    # Dialog methods
-    def edit_document_properties(self):
-        dialog = FrontMatterDialog(self.document_manager.metadata, self)
-        if dialog.exec() == QDialog.Accepted:
-            self.document_manager.metadata = dialog.get_metadata()
-            self.update_document_with_front_matter()
+    def toggle_mode(self):
+        new_mode = EditorMode.WYSIWYG if self.current_mode == EditorMode.MARKDOWN else EditorMode.MARKDOWN
+        self.set_mode(new_mode)
+        self.mode_changed.emit(new_mode)
     
-    def update_document_with_front_matter(self):
-        content = self.editor.toPlainText()
-        
-        # Remove existing front matter
-        if content.startswith('---'):
-            parts = content.split('---', 2)
-            if len(parts) >= 3:
-                content = parts[2].lstrip('\n')
-        
-        # Add new front matter
-        front_matter = self.document_manager.generate_front_matter(self.document_manager.metadata)
-        new_content = front_matter + content
+    def set_mode(self, mode: EditorMode):
+        self.current_mode = mode
         
-        self.editor.setPlainText(new_content)
-        self.is_modified = True
-        self.update_title()
-    
-    def show_settings(self):
-        dialog = SettingsDialog(self)
-        dialog.exec()
-    
-    # View methods
-    def toggle_sidebar(self):
-        self.sidebar.setVisible(not self.sidebar.isVisible())
-    
-    def toggle_focus_mode(self):
-        if self.isFullScreen():
-            self.showNormal()
-            self.sidebar.show()
-            self.toolbar.show()
-            self.menuBar().show()
-            self.statusBar().show()
-        else:
-            self.showFullScreen()
-            self.sidebar.hide()
-            self.toolbar.hide()
-            self.menuBar().hide()
-            self.statusBar().hide()
-    
-    def keyPressEvent(self, event):
-        if event.key() == Qt.Key_F11:
-            self.toggle_focus_mode()
-            event.accept()
-        elif event.key() == Qt.Key_1 and event.modifiers() == Qt.ControlModifier:
-            self.switch_to_markdown_mode()
-            event.accept()
-        elif event.key() == Qt.Key_2 and event.modifiers() == Qt.ControlModifier:
-            self.switch_to_wysiwyg_mode()
-            event.accept()
+        if mode == EditorMode.MARKDOWN:
+            self.mode_label.setText("📝 Markdown Mode")
+            self.switch_button.setText("Switch to WYSIWYG")
+            self.mode_label.setStyleSheet("""
+                QLabel {
+                    background-color: #0969da;
+                    color: white;
+                    padding: 6px 12px;
+                    border-radius: 4px;
+                    font-weight: bold;
+                }
+            """)
         else:
-            super().keyPressEvent(event)
+            self.mode_label.setText("🎨 WYSIWYG Mode")
+            self.switch_button.setText("Switch to Markdown")
+            self.mode_label.setStyleSheet("""
+                QLabel {
+                    background-color: #fb8500;
+                    color: white;
+                    padding: 6px 12px;
+                    border-radius: 4px;
+                    font-weight: bold;
+                }
+            """)
+
+
+class EnhancedLintingWidget(LintingWidget):
+    """Enhanced linting with click-to-goto"""
+    issue_clicked = Signal(int)
     
-    # Utility methods
-    def center_window(self):
-        screen = QApplication.primaryScreen().geometry()
-        window = self.geometry()
-        x = (screen.width() - window.width()) // 2
-        y = (screen.height() - window.height()) // 2
-        self.move(x, y)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.issues_list.itemClicked.connect(self.on_issue_clicked)
     
-    def update_title(self):
-        title = "FoxMark - Advanced Markdown Editor"
-        if self.current_file:
-            filename = Path(self.current_file).name
-            title = f"{filename} - FoxMark"
-        if self.is_modified:
-            title = f"● {title}"
-        self.setWindowTitle(title)
+    def on_issue_clicked(self, item):
+        text = item.text()
+        if text.startswith("Line "):
+            try:
+                line_part = text.split(":")[0]
+                line_number = int(line_part.split(" ")[1])
+                self.issue_clicked.emit(line_number)
+            except (ValueError, IndexError):
+                pass
+
+
+class EnhancedMainWindow(QMainWindow):
+    """Ultra-smooth main window with perfect sync"""
     
-    def update_word_count(self):
-        text = self.editor.toPlainText()
+    def __init__(self):
+        super().__init__(parent=None)
+        self.current_file = None
+        self.is_modified = False
+        self.document_manager = DocumentManager()
+        self.current_mode = EditorMode.MARKDOWN
+        self._syncing = False
         
-        if text.startswith('---'):
-            parts = text.split('---', 2)
-            if len(parts) >= 3:
-                text = parts[2]
+        # Coalesce preview, outline and lint refreshes while typing
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(250)
+        self._update_timer.timeout.connect(self._flush_updates)
         
-        words = len(text.split()) if text.strip() else 0
-        chars = len(text)
-        paragraphs = len([p for p in text.split('\n\n') if p.strip()]) if text.strip() else 0
+        self._views_stale = False
         
-        self.word_count_label.setText(f"Words: {words} | Chars: {chars} | ¶: {paragraphs}")
+        UltraSmoothPreview.disk_cache_enabled = QSettings().value(_DISK_CACHE_SETTING, False, type=bool)
+        
+        # Window shortcuts handled in keyPressEvent, keyed by (key, modifiers);
+        # None matches any modifiers, and the keypad bit is ignored
+        self._key_handlers = {
+            (Qt.Key_F11, None): self.toggle_focus_mode,
+            (Qt.Key_1, Qt.ControlModifier): self.switch_to_markdown_mode,
+            (Qt.Key_2, Qt.ControlModifier): self.switch_to_wysiwyg_mode,
+        }
+        
+        # Dialogs are built on first use and reused afterwards
+        self._front_matter_dialog = None
+        self._settings_dialog = None
+        
+        self.setup_ui()
+        self.setup_menu()
+        self.setup_toolbar()
+        self.setup_statusbar()
+        self.setup_connections()
+        self.apply_theme()
+        
+        self.setWindowTitle("FoxMark - Advanced Markdown Editor")
+        self.setMinimumSize(1400, 900)
+        self.resize(1600, 1000)
+        self.center_window()
     
-    def update_cursor_position(self):
-        cursor = self.editor.textCursor()
-        line = cursor.blockNumber() + 1
-        col = cursor.columnNumber() + 1
-        self.cursor_position_label.setText(f"Line: {line}, Col: {col}")
+    def setup_ui(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.setSpacing(0)
+        
+        # Mode toggle
+        self.mode_toggle = OptimizedModeToggle()
+        self.mode_toggle.mode_changed.connect(self.on_mode_changed)
+        main_layout.addWidget(self.mode_toggle)
+        
+        # Content layout
+        content_layout = QHBoxLayout()
+        content_layout.setContentsMargins(0, 0, 0, 0)
+        
+        # Sidebar
+        self.sidebar = SidebarWidget()
+        self.sidebar.setMaximumWidth(300)
+        
+        self.linting_widget = EnhancedLintingWidget()
+        self.linting_widget.issue_clicked.connect(self.goto_line_from_issue)
+        self.sidebar.tab_widget.addTab(self.linting_widget, "Issues")
+        
+        content_layout.addWidget(self.sidebar)
+        
+        # Main content stack
+        self.content_stack = QStackedWidget()
+        
+        # Markdown mode widget
+        self.markdown_widget = QWidget()
+        markdown_layout = QHBoxLayout(self.markdown_widget)
+        markdown_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.editor_splitter = QSplitter(Qt.Horizontal)
+        self.editor = SmoothMarkdownEditor()
+        self.preview = UltraSmoothPreview()
+        
+        self.editor_splitter.addWidget(self.editor)
+        self.editor_splitter.addWidget(self.preview)
+        self.editor_splitter.setSizes([700, 700])
+        
+        markdown_layout.addWidget(self.editor_splitter)
+        
+        # WYSIWYG mode widget
+        self.wysiwyg_widget = QWidget()
+        wysiwyg_layout = QHBoxLayout(self.wysiwyg_widget)
+        wysiwyg_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.wysiwyg_preview = UltraSmoothPreview()
+        wysiwyg_layout.addWidget(self.wysiwyg_preview)
+        
+        # Add to stack
+        self.content_stack.addWidget(self.markdown_widget)
+        self.content_stack.addWidget(self.wysiwyg_widget)
+        
+        content_layout.addWidget(self.content_stack)
+        main_layout.addLayout(content_layout)
+        
+        # Start in markdown mode
+        self.set_editor_mode(EditorMode.MARKDOWN)
     
-    def check_save_changes(self) -> bool:
-        if self.is_modified:
-            reply = QMessageBox.question(
-                self, "Unsaved Changes",
-                "Do you want to save your changes?",
-                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
-            )
-            
-            if reply == QMessageBox.Save:
-                self.save_file()
-                return not self.is_modified
-            elif reply == QMessageBox.Cancel:
-                return False
+    def setup_connections(self):
+        # Editor connections
+        self.editor.content_changed.connect(self.on_editor_content_changed)
+        self.editor.cursor_position_changed.connect(self.on_editor_cursor_changed)
+        self.editor.scroll_changed.connect(self.on_editor_scroll_changed)
         
-        return True
+        # Preview connections
+        self.preview.scroll_sync_requested.connect(self.sync_editor_scroll)
+        self.preview.content_edited.connect(self.on_preview_content_edited)
+        
+        # WYSIWYG connections - THIS IS THE KEY FIX!
+        self.wysiwyg_preview.content_edited.connect(self.on_wysiwyg_content_edited)
+        
+        # Sidebar connections
+        self.sidebar.file_explorer.file_selected.connect(self.open_file_from_explorer)
+        self.sidebar.document_outline.heading_selected.connect(self.goto_heading)
+        
+        # Catch up on updates skipped while these were hidden
+        self.preview.installEventFilter(self)
+        self.sidebar.installEventFilter(self)
     
-    # Quick actions for toolbar
-    def insert_markdown(self, prefix: str, suffix: str = ""):
-        self.editor.insert_markdown(prefix, suffix)
+    def on_mode_changed(self, mode: EditorMode):
+        """Handle mode change with perfect sync"""
+        self.set_editor_mode(mode)
     
-    def insert_header(self, level: int):
-        self.editor.insert_header(level)
+    def set_editor_mode(self, mode: EditorMode):
+        """Set editor mode with ultra-smooth transitions"""
+        if self.current_mode == mode:
+            return
+        
+        self.current_mode = mode
+        content = self.editor.toPlainText()
+        
+        if mode == EditorMode.MARKDOWN:
+            # Show markdown view
+            self.content_stack.setCurrentIndex(0)
+            
+            # Update preview with current editor content
+            self.preview.update_content_smooth(content, editable=False)
+            
+            self.statusBar().showMessage("Markdown Mode - Source editing", 1500)
+            
+        else:  # WYSIWYG
+            # Show WYSIWYG view
+            self.content_stack.setCurrentIndex(1)
+            
+            # Update WYSIWYG with current editor content and make editable
+            self.wysiwyg_preview.update_content_smooth(content, editable=True)
+            
+            self.statusBar().showMessage("WYSIWYG Mode - Visual editing", 1500)
+        
+        self.mode_toggle.set_mode(mode)
+        self.run_linting(content)
     
-    def insert_table(self):
-        self.editor.insert_table()
+    def switch_to_markdown_mode(self):
+        """Switch to markdown mode with content sync"""
+        if self.current_mode == EditorMode.WYSIWYG:
+            # Get content from WYSIWYG and update editor
+            self.wysiwyg_preview.get_content_as_markdown(self.sync_wysiwyg_to_editor)
+        else:
+            self.set_editor_mode(EditorMode.MARKDOWN)
     
-    def insert_link(self):
-        self.editor.insert_link()
+    def sync_wysiwyg_to_editor(self, markdown_content):
+        """Sync WYSIWYG content back to editor - THE KEY FIX!"""
+        if markdown_content and not self._syncing:
+            self._syncing = True
+            try:
+                self.editor.set_content_silently(markdown_content)
+                self.is_modified = True
+                self.update_title()
+            finally:
+                self._syncing = False
+        
+        self.set_editor_mode(EditorMode.MARKDOWN)
     
-    def insert_image(self):
-        self.editor.insert_image()
+    def switch_to_wysiwyg_mode(self):
+        """Switch to WYSIWYG mode"""
+        self.set_editor_mode(EditorMode.WYSIWYG)
     
-    def closeEvent(self, event):
-        if self.check_save_changes():
-            event.accept()
+    def on_editor_content_changed(self):
+        """Handle editor content changes"""
+        if self._syncing or self.current_mode != EditorMode.MARKDOWN:
+            return
+        
+        # Per keystroke work stays minimal: the title only changes on the first edit,
+        # and restarting the timer defers rendering until typing pauses
+        if not self.is_modified:
+            self.is_modified = True
+            self.update_title()
+        self._update_timer.start()
+    
+    def _flush_updates(self):
+        """Refresh preview, outline, word count and linting from one snapshot"""
+        # The word count comes from per-block stats, so the text is only copied for visible views
+        content = None
+        
+        # Hidden views are skipped; showing them again triggers a catch-up
+        self._views_stale = False
+        if self.current_mode == EditorMode.MARKDOWN:
+            if self.preview.isVisible():
+                content = self.editor.toPlainText()
+                self.preview.update_content_smooth(content, editable=False)
+            else:
+                self._views_stale = True
+        
+        if self.sidebar.isVisible():
+            if content is None:
+                content = self.editor.toPlainText()
+            self.sidebar.document_outline.update_outline(content)
+            self.run_linting(content)
         else:
-            event.ignore()
-
-
-def main():
-    app = QApplication(sys.argv)
-    
-    app.setApplicationName("FoxMark - Advanced Markdown Editor")
-    app.setApplicationVersion("2.2.0")
-    app.setOrganizationName("FoxMark Team")
+            self._views_stale = True
+        
+        self.update_word_count()
     
-    window = EnhancedMainWindow()
-    window.show()
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Show and self._views_stale and watched in (self.preview, self.sidebar):
+            self._update_timer.start()
+        return super().eventFilter(watched, event)
     
-    # Load optimized sample content
-    sample_content = """---
-title: "FoxMark Ultra-Smooth Edition"
-author: "FoxMark Team"
-date: "2025-01-18"
-tags: ["markdown", "wysiwyg", "smooth"]
----
-
-# 🦊 FoxMark Ultra-Smooth Edition
-
-**Perfect bidirectional sync** with **zero flashing**!
-
-## ✅ Issues Fixed
-
-### 🔄 **WYSIWYG ↔ Markdown Sync**
-- **WYSIWYG edits now update markdown** ✅
-- **Perfect content preservation** during mode switches
-- **Real-time bidirectional sync** working flawlessly
-
-### 🚀 **Zero Flashing**
-- **JavaScript content updates** instead of page reloads
-- **Smooth transitions** with optimized rendering
-- **No more flickering** or visual disruptions
-
-### 🖋️ **Fixed Font Issues**
-- **System font fallbacks** prevent font warnings
-- **Optimized font handling** for better performance
-- **Clean console output** with no font errors
-
-## 🎯 **Test These Features**
-
-1. **Switch to WYSIWYG mode** (Ctrl+2)
-2. **Edit content visually** → watch markdown update!
-3. **Switch back to Markdown** (Ctrl+1) → content preserved!
-4. **Click issues in sidebar** → jumps to exact line
-5. **Notice smooth updates** → no flashing!
-
-## 💡 **Pro Tips**
-
-- **F11**: Focus mode for distraction-free writing
-- **Ctrl+\\**: Toggle sidebar
-- **Real-time sync**: Edit in either mode seamlessly
-
----
-
-**Your optimized markdown editing experience awaits!** 🎉
-"""
+    def on_preview_content_edited(self, markdown_content: str):
+        """Handle markdown preview editing"""
+        if self._syncing or self.current_mode != EditorMode.MARKDOWN:
+            return
+        
+        self._syncing = True
+        try:
+            self.editor.set_content_silently(markdown_content)
+            self.is_modified = True
+            self.update_title()
+        finally:
+            self._syncing = False
+        
+        self._update_timer.start()
     
-    window.editor.setPlainText(sample_content)
+    def on_wysiwyg_content_edited(self, markdown_content: str):
+        """Handle WYSIWYG content editing - CRITICAL FIX!"""
+        if self._syncing or self.current_mode != EditorMode.WYSIWYG:
+            return
+        
+        self._syncing = True
+        try:
+            # Update the underlying editor content
+            self.editor.set_content_silently(markdown_content)
+            self.is_modified = True
+            self.update_title()
+        finally:
+            self._syncing = False
+        
+        self._update_timer.start()
     
-    sys.exit(app.exec())
-
-
-if __name__ == "__main__":
-    main()
-            cursor.insertText(f"{prefix}text{suffix}")
-            for _ in range(len(suffix) + 4):
-                cursor.movePosition(QTextCursor.Left)
-            for _ in range(4):
-                cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor)
-            self.setTextCursor(cursor)
+    def on_editor_cursor_changed(self, line_number: int):
+        """Handle cursor changes"""
+        if not self._syncing and self.current_mode == EditorMode.MARKDOWN:
+            self.preview.scroll_to_line(line_number)
     
-    def insert_header(self, level: int):
-        cursor = self.textCursor()
-        cursor.movePosition(QTextCursor.StartOfLine)
-        current_line = cursor.block().text()
-        clean_line = re.sub(r'^#+\s*', '', current_line)
-        header_text = f"{'#' * level} {clean_line}" if clean_line else f"{'#' * level} Header {level}"
-        cursor.select(QTextCursor.LineUnderCursor)
-        cursor.insertText(header_text)
+    def on_editor_scroll_changed(self, ratio: float):
+        """Handle scroll changes"""
+        if not self._syncing and self.current_mode == EditorMode.MARKDOWN:
+            self.preview.sync_scroll_position(ratio)
     
-    def insert_table(self):
-        table_template = """| Column 1 | Column 2 | Column 3 |
-|----------|----------|----------|
-| Cell 1   | Cell 2   | Cell 3   |
-| Cell 4   | Cell 5   | Cell 6   |
-"""
-        cursor = self.textCursor()
-        cursor.insertText(table_template)
+    def sync_editor_scroll(self, ratio: float):
+        """Sync editor scroll from preview"""
+        if not self._syncing and self.current_mode == EditorMode.MARKDOWN:
+            self.editor.sync_scroll_position(ratio)
     
-    def insert_link(self):
-        cursor = self.textCursor()
-        if cursor.hasSelection():
-            selected_text = cursor.selectedText()
-            cursor.insertText(f"[{selected_text}](url)")
+    def goto_line_from_issue(self, line_number: int):
+        """Go to line from linting issue"""
+        if self.current_mode == EditorMode.WYSIWYG:
+            self.switch_to_markdown_mode()
+            QTimer.singleShot(200, lambda: self._goto_line_actual(line_number))
         else:
-            cursor.insertText("[link text](url)")
+            self._goto_line_actual(line_number)
     
-    def insert_image(self):
-        cursor = self.textCursor()
-        cursor.insertText("![alt text](image_url)")
-
-
-class SmoothSyntaxHighlighter(QSyntaxHighlighter):
-    """Optimized syntax highlighter"""
+    def _goto_line_actual(self, line_number: int):
+        """Actually navigate to line"""
+        self.editor.goto_line(line_number - 1)
+        self.editor.setFocus()
+        QTimer.singleShot(100, lambda: self.preview.scroll_to_line(line_number - 1))
     
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.highlighting_rules = []
+    def goto_heading(self, line_number: int):
+        """Navigate to heading"""
+        self.editor.goto_line(line_number)
+        QTimer.singleShot(100, lambda: self.preview.scroll_to_line(line_number))
+        self.editor.setFocus()
+    
+    def open_file_from_explorer(self, file_path: str):
+        self.open_file(file_path)
+    
+    def run_linting(self, content: str = None):
+        """Run document linting"""
+        if content is None:
+            content = self.editor.toPlainText()
+        front_matter_title = getattr(self.document_manager.metadata, 'title', '')
+        # LintingWidget debounces check_document itself
+        self.linting_widget.check_document(content, front_matter_title)
+    
+    # Menu and toolbar setup
+    def setup_menu(self):
+        menubar = self.menuBar()
         
-        colors = {
-            'header': QColor('#58a6ff'),
-            'bold': QColor('#ffa657'),
-            'italic': QColor('#a5d6ff'),
-            'code': QColor('#f47067'),
-            'link': QColor('#7ee787'),
-        }
+        # File menu
+        file_menu = menubar.addMenu('File')
         
-        # Headers
-        header_format = QTextCharFormat()
-        header_format.setForeground(colors['header'])
-        header_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((QRegularExpression(r'^#{1,6}\s.*'), header_format))
+        new_action = QAction('New', self)
+        new_action.setShortcut('Ctrl+N')
+        new_action.triggered.connect(self.new_file)
+        file_menu.addAction(new_action)
         
-        # Bold
-        bold_format = QTextCharFormat()
-        bold_format.setForeground(colors['bold'])
-        bold_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((QRegularExpression(r'\*\*[^*]+\*\*'), bold_format))
-        
-        # Italic
-        italic_format = QTextCharFormat()
-        italic_format.setForeground(colors['italic'])
-        italic_format.setFontItalic(True)
-        self.highlighting_rules.append((QRegularExpression(r'\*[^*]+\*'), italic_format))
-        
-        # Code
-        code_format = QTextCharFormat()
-        code_format.setForeground(colors['code'])
-        self.highlighting_rules.append((QRegularExpression(r'`[^`]+`'), code_format))
-        
-        # Links
-        link_format = QTextCharFormat()
-        link_format.setForeground(colors['link'])
-        self.highlighting_rules.append((QRegularExpression(r'\[[^\]]+\]\([^)]+\)'), link_format))
-    
-    def highlightBlock(self, text):
-        for pattern, format in self.highlighting_rules:
-            if pattern.isValid():
-                iterator = pattern.globalMatch(text)
-                while iterator.hasNext():
-                    match = iterator.next()
-                    self.setFormat(match.capturedStart(), match.capturedLength(), format)
-
-
-class UltraSmoothPreview(QWebEngineView):
-    """Ultra-smooth preview with NO flashing"""
-    scroll_sync_requested = Signal(float)
-    content_edited = Signal(str)
-    cursor_sync_requested = Signal(int)
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.markdown_processor = markdown.Markdown(
-            extensions=['codehilite', 'tables', 'toc', 'fenced_code'],
-            extension_configs={'codehilite': {'css_class': 'highlight'}}
-        )
-        
-        # Bridge for communication
-        self.channel = QWebChannel()
-        self.page().setWebChannel(self.channel)
-        self.bridge = PreviewBridge()
-        self.channel.registerObject("bridge", self.bridge)
+        open_action = QAction('Open...', self)
+        open_action.setShortcut('Ctrl+O')
+        open_action.triggered.connect(self.open_file)
+        file_menu.addAction(open_action)
         
-        # Connect signals
-        self.bridge.scroll_changed.connect(self.scroll_sync_requested.emit)
-        self.bridge.content_changed.connect(self.on_content_edited)
+        file_menu.addSeparator()
         
-        # Prevent flashing variables
-        self._current_content = ""
-        self._is_updating = False
-        self._content_hash = ""
+        save_action = QAction('Save', self)
+        save_action.setShortcut('Ctrl+S')
+        save_action.triggered.connect(self.save_file)
+        file_menu.addAction(save_action)
         
-        # Initialize with empty content
-        self.set_initial_content()
-    
-    def set_initial_content(self):
-        """Set initial HTML structure"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-            <style>{self.get_css()}</style>
-        </head>
-        <body>
-            <div id="content" class="markdown-body"></div>
-            <script>{self.get_javascript()}</script>
-        </body>
-        </html>
-        """
-        self.setHtml(html)
-    
-    def update_content_smooth(self, markdown_text: str, editable: bool = False):
-        """Update content without flashing - key optimization!"""
-        # Skip if content hasn't changed
-        content_hash = hash(markdown_text)
-        if content_hash == self._content_hash and not self._is_updating:
-            return
+        save_as_action = QAction('Save As...', self)
+        save_as_action.setShortcut('Ctrl+Shift+S')
+        save_as_action.triggered.connect(self.save_file_as)
+        file_menu.addAction(save_as_action)
         
-        if self._is_updating:
-            return
+        file_menu.addSeparator()
         
-        self._is_updating = True
-        self._content_hash = content_hash
+        # Document properties
+        properties_action = QAction('Document Properties...', self)
+        properties_action.setShortcut('Ctrl+Alt+P')
+        properties_action.triggered.connect(self.edit_document_properties)
+        file_menu.addAction(properties_action)
         
-        try:
-            # Convert markdown to HTML
-            html_content = self.markdown_processor.convert(markdown_text)
-            
-            # Properly escape content for JavaScript
-            escaped_content = (html_content
-                             .replace('\\', '\\\\')
-                             .replace('"', '\\"')
-                             .replace('\n', '\\n')
-                             .replace('\r', '\\r'))
-            
-            # Use JavaScript to update content smoothly
-            js_code = f"""
-            var content = document.getElementById('content');
-            if (content) {{
-                var scrollTop = window.pageYOffset;
-                content.innerHTML = "{escaped_content}";
-                content.contentEditable = '{str(editable).lower()}';
-                window.scrollTo(0, scrollTop);
-                if ({str(editable).lower()}) {{
-                    setupEditingHandlers();
-                }}
-            }}
-            """
-            
-            self.page().runJavaScript(js_code)
-            
-        except Exception as e:
-            print(f"Preview update error: {e}")
-        finally:
-            # Reset flag after short delay
-            QTimer.singleShot(50, lambda: setattr(self, '_is_updating', False))
-    
-    def on_content_edited(self, html_content: str):
-        """Handle content editing in WYSIWYG mode"""
-        if self._is_updating:
-            return
+        file_menu.addSeparator()
         
-        # Convert HTML back to markdown
-        markdown_content = self.html_to_markdown(html_content)
-        self.content_edited.emit(markdown_content)
-    
-    def html_to_markdown(self, html: str) -> str:
-        """Enhanced HTML to Markdown conversion"""
-        import re
+        # Export submenu
+        export_menu = file_menu.addMenu('Export')
         
-        text = html.strip()
+        formats = ['HTML', 'PDF', 'DOCX', 'ODT', 'EPUB', 'LaTeX']
+        for fmt in formats:
+            action = QAction(f'Export as {fmt}...', self)
+            action.setData(fmt)
+            export_menu.addAction(action)
+        export_menu.triggered.connect(self._on_export_triggered)
         
-        # Headers
-        for i in range(6, 0, -1):
-            text = re.sub(f'<h{i}[^>]*>(.*?)</h{i}>', f'{"#" * i} \\1', text, flags=re.IGNORECASE | re.DOTALL)
+        # View menu
+        view_menu = menubar.addMenu('View')
         
-        # Formatting
-        text = re.sub(r'<strong[^>]*>(.*?)</strong>', r'**\1**', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<em[^>]*>(.*?)</em>', r'*\1*', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<code[^>]*>(.*?)</code>', r'`\1`', text, flags=re.IGNORECASE | re.DOTALL)
+        markdown_mode_action = QAction('Markdown Mode', self)
+        markdown_mode_action.setShortcut('Ctrl+1')
+        markdown_mode_action.triggered.connect(self.switch_to_markdown_mode)
+        view_menu.addAction(markdown_mode_action)
         
-        # Links
-        text = re.sub(r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>', r'[\2](\1)', text, flags=re.IGNORECASE | re.DOTALL)
+        wysiwyg_mode_action = QAction('WYSIWYG Mode', self)
+        wysiwyg_mode_action.setShortcut('Ctrl+2')
+        wysiwyg_mode_action.triggered.connect(self.switch_to_wysiwyg_mode)
+        view_menu.addAction(wysiwyg_mode_action)
         
-        # Images
-        text = re.sub(r'<img[^>]*src=["\']([^"\']*)["\'][^>]*alt=["\']([^"\']*)["\'][^>]*/?>', r'![\2](\1)', text, flags=re.IGNORECASE)
+        view_menu.addSeparator()
         
-        # Paragraphs and line breaks
-        text = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<br[^>]*/?>', r'\n', text, flags=re.IGNORECASE)
+        toggle_sidebar_action = QAction('Toggle Sidebar', self)
+        toggle_sidebar_action.setShortcut('Ctrl+\\')
+        toggle_sidebar_action.triggered.connect(self.toggle_sidebar)
+        view_menu.addAction(toggle_sidebar_action)
         
-        # Lists
-        text = re.sub(r'<ul[^>]*>(.*?)</ul>', lambda m: self.convert_list(m.group(1), False), text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'<ol[^>]*>(.*?)</ol>', lambda m: self.convert_list(m.group(1), True), text, flags=re.IGNORECASE | re.DOTALL)
+        focus_mode_action = QAction('Focus Mode', self)
+        focus_mode_action.setShortcut('F11')
+        focus_mode_action.triggered.connect(self.toggle_focus_mode)
+        view_menu.addAction(focus_mode_action)
         
-        # Clean up
-        text = re.sub(r'<[^>]+>', '', text)
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+        # Tools menu
+        tools_menu = menubar.addMenu('Tools')
         
-        return text.strip()
+        settings_action = QAction('Settings...', self)
+        settings_action.triggered.connect(self.show_settings)
+        tools_menu.addAction(settings_action)
     
-    def convert_list(self, list_content: str, ordered: bool) -> str:
-        import re
-        items = re.findall(r'<li[^>]*>(.*?)</li>', list_content, re.IGNORECASE | re.DOTALL)
-        result = []
-        
-        for i, item in enumerate(items):
-            item = item.strip()
-            if ordered:
-                result.append(f"{i+1}. {item}")
-            else:
-                result.append(f"- {item}")
-        
-        return '\n' + '\n'.join(result) + '\n\n'
+    def _on_export_triggered(self, action: QAction):
+        self.export_file(action.data())
     
-    def set_editable(self, editable: bool):
-        """Set content editable state"""
-        js_code = f"""
-        var content = document.getElementById('content');
-        if (content) {{
-            content.contentEditable = '{str(editable).lower()}';
-            if ({str(editable).lower()}) {{
-                content.style.cursor = 'text';
-                setupEditingHandlers();
-            }} else {{
-                content.style.cursor = 'default';
-            }}
-        }}
-        """
-        self.page().runJavaScript(js_code)
+    def setup_toolbar(self):
+        self.toolbar = QuickActionsToolbar(self)
+        self.addToolBar(self.toolbar)
     
-    def get_content_as_markdown(self, callback):
-        """Get current content as markdown"""
-        def handle_html(html_content):
-            if html_content:
-                markdown_content = self.html_to_markdown(html_content)
-                callback(markdown_content)
-            else:
-                callback("")
+    def setup_statusbar(self):
+        status_bar = self.statusBar()
         
-        self.page().runJavaScript("document.getElementById('content').innerHTML", handle_html)
-    
-    def scroll_to_line(self, line_number: int):
-        """Scroll to specific line"""
-        js_code = f"""
-        var elements = document.querySelectorAll('h1, h2, h3, h4, h5, h6, p, li, pre, blockquote');
-        if (elements.length > {line_number} && elements[{line_number}]) {{
-            elements[{line_number}].scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-        }}
-        """
-        self.page().runJavaScript(js_code)
-    
-    def sync_scroll_position(self, ratio: float):
-        """Sync scroll position"""
-        js_code = f"""
-        var maxScroll = Math.max(0, document.documentElement.scrollHeight - window.innerHeight);
-        window.scrollTo(0, {ratio} * maxScroll);
-        """
-        self.page().runJavaScript(js_code)
+        self.word_count_label = QLabel("Words: 0")
+        status_bar.addPermanentWidget(self.word_count_label)
+        
+        self.cursor_position_label = QLabel("Line: 1, Col: 1")
+        status_bar.addPermanentWidget(self.cursor_position_label)
+        
+        # Connect cursor position updates
+        self.editor.cursorPositionChanged.connect(self.update_cursor_position)
     
-    def get_css(self):
-        return """
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
-            line-height: 1.6;
-            color: #e1e4e8;
+    def apply_theme(self):
+        """Apply dark theme"""
+        self.setStyleSheet("""
+        QMainWindow {
             background-color: #0d1117;
-            margin: 0;
-            padding: 20px;
-            transition: none !important;
+            color: #e1e4e8;
         }
         
-        .markdown-body {
-            max-width: none;
-            transition: none !important;
+        QWidget {
+            background-color: #0d1117;
+            color: #e1e4e8;
         }
         
-        .markdown-body * {
-            transition: none !important;
+        QTabWidget::pane {
+            border: 1px solid #30363d;
+            background-color: #161b22;
         }
         
-        h1, h2, h3, h4, h5, h6 {
-            color: #58a6ff;
-            margin-top: 24px;
-            margin-bottom: 16px;
-            font-weight: 600;
-            line-height: 1.25;
+        QTabBar::tab {
+            background-color: #21262d;
+            color: #e1e4e8;
+            padding: 8px 12px;
+            margin-right: 2px;
+            border-top-left-radius: 4px;
+            border-top-right-radius: 4px;
         }
         
-        h1 { font-size: 2em; }
-        h2 { font-size: 1.5em; }
-        h3 { font-size: 1.25em; }
-        
-        p { margin-bottom: 16px; }
-        
-        code {
-            padding: 2px 4px;
-            font-size: 85%;
+        QTabBar::tab:selected {
             background-color: #161b22;
-            border-radius: 3px;
-            color: #f47067;
         }
         
-        pre {
-            padding: 16px;
+        QTreeWidget, QListWidget {
             background-color: #161b22;
-            border-radius: 6px;
-            overflow-x: auto;
+            border: none;
+            color: #e1e4e8;
         }
         
-        blockquote {
-            padding: 0 16px;
-            color: #8b949e;
-            border-left: 4px solid #30363d;
-            margin: 0 0 16px 0;
+        QTreeWidget::item, QListWidget::item {
+            padding: 6px;
+            border-bottom: 1px solid #21262d;
         }
         
-        table {
-            border-collapse: collapse;
-            margin-bottom: 16px;
-            width: 100%;
+        QTreeWidget::item:selected, QListWidget::item:selected {
+            background-color: #264f78;
         }
         
-        table th, table td {
-            padding: 6px 13px;
-            border: 1px solid #30363d;
+        QTreeWidget::item:hover, QListWidget::item:hover {
+            background-color: #30363d;
         }
         
-        table th {
+        QTextEdit, QPlainTextEdit {
+            background-color: #0d1117;
+            color: #e1e4e8;
+            border: none;
+            selection-background-color: #264f78;
+        }
+        
+        QSplitter::handle {
+            background-color: #21262d;
+            width: 2px;
+        }
+        
+        QSplitter::handle:hover {
+            background-color: #30363d;
+        }
+        
+        QStatusBar {
             background-color: #161b22;
-            font-weight: 600;
+            color: #8b949e;
+            border-top: 1px solid #30363d;
         }
         
-        ul, ol {
-            padding-left: 30px;
-            margin-bottom: 16px;
+        QStackedWidget {
+            background-color: #0d1117;
         }
         
-        li { margin-bottom: 4px; }
+        QToolBar {
+            background-color: #161b22;
+            border-bottom: 1px solid #30363d;
+            spacing: 4px;
+        }
         
-        a {
-            color: #7ee787;
-            text-decoration: none;
+        QToolBar QToolButton {
+            background-color: #21262d;
+            color: #e1e4e8;
+            border: 1px solid #30363d;
+            border-radius: 4px;
+            padding: 6px 12px;
+            font-weight: bold;
         }
         
-        a:hover { text-decoration: underline; }
+        QToolBar QToolButton:hover {
+            background-color: #30363d;
+        }
         
-        strong { color: #ffa657; }
-        em { color: #a5d6ff; }
+        QToolBar QToolButton:pressed {
+            background-color: #264f78;
+        }
         
-        [contenteditable="true"]:focus {
-            outline: 2px solid #58a6ff;
-            outline-offset: 2px;
+        QMenuBar {
+            background-color: #161b22;
+            color: #e1e4e8;
+            border-bottom: 1px solid #30363d;
+            padding: 4px;
+        }
+        
+        QMenuBar::item {
+            background: transparent;
+            padding: 8px 12px;
             border-radius: 4px;
         }
-        """
-    
-    def get_javascript(self):
-        return """
-        var bridge;
-        var isEditing = false;
         
-        new QWebChannel(qt.webChannelTransport, function(channel) {
-            bridge = channel.objects.bridge;
-            setupEditingHandlers();
-        });
+        QMenuBar::item:selected {
+            background-color: #21262d;
+        }
         
-        function setupEditingHandlers() {
-            var content = document.getElementById('content');
-            if (!content || isEditing) return;
-            
-            isEditing = true;
-            
-            // Content editing
-            content.addEventListener('input', function() {
-                if (bridge && bridge.on_content_changed) {
-                    bridge.on_content_changed(content.innerHTML);
-                }
-            });
-            
-            // Paste handling
-            content.addEventListener('paste', function(e) {
-                e.preventDefault();
-                var text = (e.originalEvent || e).clipboardData.getData('text/plain');
-                document.execCommand('insertText', false, text);
-            });
-            
-            // Scroll sync
-            var scrollTimeout;
-            window.addEventListener('scroll', function() {
-                clearTimeout(scrollTimeout);
-                scrollTimeout = setTimeout(function() {
-                    var scrollTop = window.pageYOffset;
-                    var scrollHeight = Math.max(0, document.documentElement.scrollHeight - window.innerHeight);
-                    var ratio = scrollHeight > 0 ? scrollTop / scrollHeight : 0;
-                    
-                    if (bridge && bridge.on_scroll_changed) {
-                        bridge.on_scroll_changed(ratio);
-                    }
-                }, 10);
-            });
+        QMenu {
+            background-color: #161b22;
+            color: #e1e4e8;
+            border: 1px solid #30363d;
+            border-radius: 6px;
         }
-        """
-
-
-class PreviewBridge(QObject):
-    """Bridge for web communication"""
-    scroll_changed = Signal(float)
-    content_changed = Signal(str)
+        
+        QMenu::item {
+            padding: 8px 20px;
+        }
+        
+        QMenu::item:selected {
+            background-color: #21262d;
+        }
+        """)
     
-    @Slot(float)
-    def on_scroll_changed(self, ratio):
-        self.scroll_changed.emit(ratio)
+    # File operations
+    def new_file(self):
+        if self.check_save_changes():
+            UltraSmoothPreview.clear_html_cache()
+            self.editor.clear()
+            self.current_file = None
+            self.is_modified = False
+            self.document_manager.metadata = self.document_manager.create_empty_metadata()
+            self.update_title()
     
-    @Slot(str)
-    def on_content_changed(self, content):
-        self.content_changed.emit(content)
-
-
-class OptimizedModeToggle(QWidget):
-    """Clean mode toggle"""
-    mode_changed = Signal(EditorMode)
+    def open_file(self, file_path: str = None):
+        if self.check_save_changes():
+            if not file_path:
+                file_path, _ = QFileDialog.getOpenFileName(
+                    self, "Open Markdown File", "",
+                    "Markdown files (*.md *.markdown *.txt);;All files (*)"
+                )
+            
+            if file_path:
+                UltraSmoothPreview.clear_html_cache()
+                try:
+                    file = QFile(file_path)
+                    if not file.open(QIODevice.ReadOnly | QIODevice.Text):
+                        raise OSError(file.errorString())
+                    try:
+                        stream = QTextStream(file)
+                        stream.setEncoding(QStringConverter.Utf8)
+                        content = stream.readAll()
+                    finally:
+                        file.close()
+                    
+                    # Only the front matter block needs parsing
+                    front_matter = content[:self.document_manager.front_matter_end(content)]
+                    metadata, _ = self.document_manager.parse_front_matter(front_matter)
+                    self.document_manager.metadata = metadata
+                    
+                    # Load without per-signal editor handling; refresh views once
+                    self.editor.blockSignals(True)
+                    try:
+                        self.editor.load_content(content)
+                    finally:
+                        self.editor.blockSignals(False)
+                    self._update_timer.start()
+                    
+                    self.current_file = file_path
+                    self.is_modified = False
+                    self.update_title()
+                    
+                    file_dir = Path(file_path).parent
+                    self.sidebar.file_explorer.load_directory(file_dir)
+                    
+                except Exception as e:
+                    QMessageBox.warning(self, "Error", f"Could not open file:\n{str(e)}")
     
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.current_mode = EditorMode.MARKDOWN
-        self.setup_ui()
+    def save_file(self):
+        if self.current_file:
+            self.save_to_file(self.current_file)
+        else:
+            self.save_file_as()
     
-    def setup_ui(self):
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(8, 4, 8, 4)
-        
-        self.mode_label = QLabel("📝 Markdown Mode")
-        self.mode_label.setStyleSheet("""
-            QLabel {
-                background-color: #0969da;
-                color: white;
-                padding: 6px 12px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-        """)
-        layout.addWidget(self.mode_label)
-        
-        self.switch_button = QPushButton("Switch to WYSIWYG")
-        self.switch_button.setStyleSheet("""
-            QPushButton {
-                background-color: #21262d;
-                color: #e1e4e8;
-                border: 1px solid #30363d;
-                padding: 6px 12px;
-                border-radius: 4px;
-            }
-            QPushButton:hover { background-color: #30363d; }
-        """)
-        self.switch_button.clicked.connect(self.toggle_mode)
-        layout.addWidget(self.switch_button)
-        
-        layout.addStretch()
+    def save_file_as(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Markdown File", "",
+            "Markdown files (*.md);;All files (*)"
+        )
         
-        help_text = QLabel("Ctrl+1: Markdown | Ctrl+2: WYSIWYG")
-        help_text.setStyleSheet("color: #8b949e; font-size: 11px;")
-        layout.addWidget(help_text)
+        if file_path:
+            self.save_to_file(file_path)
+            self.current_file = file_path
+            self.update_title()
     
-    def toggle_mode(self):
-        new_mode = EditorMode.WYSIWYG if self.current_mode == EditorMode.MARKDOWN else EditorMode.MARKDOWN
-        self.set_mode(new_mode)
-        self.mode_changed.emit(new_mode)
+    def save_to_file(self, file_path: str):
+        try:
+            content = self.editor.toPlainText()
+            
+            _save_text(file_path, content)
+            self.is_modified = False
+            self.update_title()
+            self.statusBar().showMessage("File saved successfully", 2000)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not save file:\n{str(e)}")
     
-    def set_mode(self, mode: EditorMode):
-        self.current_mode = mode
+    def export_file(self, format_type: str):
+        """Export file using basic conversion"""
+        if not self.current_file:
+            QMessageBox.warning(self, "Export Error", "Please save the file first.")
+            return
         
-        if mode == EditorMode.MARKDOWN:
-            self.mode_label.setText("📝 Markdown Mode")
-            self.switch_button.setText("Switch to WYSIWYG")
-            self.mode_label.setStyleSheet("""
-                QLabel {
-                    background-color: #0969da;
-                    color: white;
-                    padding: 6px 12px;
-                    border-radius: 4px;
-                    font-weight: bold;
-                }
-            """)
-        else:
-            self.mode_label.setText("🎨 WYSIWYG Mode")
-            self.switch_button.setText("Switch to Markdown")
-            self.mode_label.setStyleSheet("""
-                QLabel {
-                    background-color: #fb8500;
-                    color: white;
-                    padding: 6px 12px;
-                    border-radius: 4px;
-                    font-weight: bold;
-                }
-            """)
-
-
-class EnhancedLintingWidget(LintingWidget):
-    """Enhanced linting with click-to-goto"""
-    issue_clicked = Signal(int)
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.issues_list.itemClicked.connect(self.on_issue_clicked)
-    
-    def on_issue_clicked(self, item):
-        text = item.text()
-        if text.startswith("Line "):
-            try:
-                line_part = text.split(":")[0]
-                line_number = int(line_part.split(" ")[1])
-                self.issue_clicked.emit(line_number)
-            except (ValueError, IndexError):
-                pass
-
-
-class EnhancedMainWindow(QMainWindow):
-    """Ultra-smooth main window with perfect sync"""
-    
-    def __init__(self):
-        super().__init__(parent=None)
-        self.current_file = None
-        self.is_modified = False
-        self.document_manager = DocumentManager()
-        self.current_mode = EditorMode.MARKDOWN
-        self._syncing = False
-        
-        self.setup_ui()
-        self.setup_menu()
-        self.setup_toolbar()
-        self.setup_statusbar()
-        self.setup_connections()
-        self.apply_theme()
-        
-        self.setWindowTitle("FoxMark - Advanced Markdown Editor")
-        self.setMinimumSize(1400, 900)
-        self.resize(1600, 1000)
-        self.center_window()
-    
-    def setup_ui(self):
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        
-        main_layout = QVBoxLayout(central_widget)
-        main_layout.setContentsMargins(0, 0, 0, 0)
-        main_layout.setSpacing(0)
-        
-        # Mode toggle
-        self.mode_toggle = OptimizedModeToggle()
-        self.mode_toggle.mode_changed.connect(self.on_mode_changed)
-        main_layout.addWidget(self.mode_toggle)
-        
-        # Content layout
-        content_layout = QHBoxLayout()
-        content_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # Sidebar
-        self.sidebar = SidebarWidget()
-        self.sidebar.setMaximumWidth(300)
-        
-        self.linting_widget = EnhancedLintingWidget()
-        self.linting_widget.issue_clicked.connect(self.goto_line_from_issue)
-        self.sidebar.tab_widget.addTab(self.linting_widget, "Issues")
-        
-        content_layout.addWidget(self.sidebar)
-        
-        # Main content stack
-        self.content_stack = QStackedWidget()
-        
-        # Markdown mode widget
-        self.markdown_widget = QWidget()
-        markdown_layout = QHBoxLayout(self.markdown_widget)
-        markdown_layout.setContentsMargins(0, 0, 0, 0)
-        
-        self.editor_splitter = QSplitter(Qt.Horizontal)
-        self.editor = SmoothMarkdownEditor()
-        self.preview = UltraSmoothPreview()
-        
-        self.editor_splitter.addWidget(self.editor)
-        self.editor_splitter.addWidget(self.preview)
-        self.editor_splitter.setSizes([700, 700])
-        
-        markdown_layout.addWidget(self.editor_splitter)
-        
-        # WYSIWYG mode widget
-        self.wysiwyg_widget = QWidget()
-        wysiwyg_layout = QHBoxLayout(self.wysiwyg_widget)
-        wysiwyg_layout.setContentsMargins(0, 0, 0, 0)
+        # Get export file path
+        extensions = {
+            'HTML': 'html',
+            'PDF': 'pdf', 
+            'DOCX': 'docx',
+            'ODT': 'odt',
+            'EPUB': 'epub',
+            'LaTeX': 'tex'
+        }
         
-        self.wysiwyg_preview = UltraSmoothPreview()
-        wysiwyg_layout.addWidget(self.wysiwyg_preview)
+        ext = extensions.get(format_type, 'html')
+        default_name = Path(self.current_file).stem + f'.{ext}'
         
-        # Add to stack
-        self.content_stack.addWidget(self.markdown_widget)
-        self.content_stack.addWidget(self.wysiwyg_widget)
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 
+            f"Export as {format_type}", 
+            default_name,
+            f"{format_type} files (*.{ext});;All files (*)"
+        )
         
-        content_layout.addWidget(self.content_stack)
-        main_layout.addLayout(content_layout)
+        if file_path:
+            if format_type == 'HTML':
+                self.export_to_html(file_path)
+            else:
+                QMessageBox.information(
+                    self, "Export", 
+                    f"{format_type} export requires Pandoc installation.\n"
+                    "Please install Pandoc for advanced export features."
+                )
+    
+    def export_to_html(self, file_path: str):
+        """Export to HTML using built-in markdown processor"""
+        try:
+            content = self.editor.toPlainText()
+            
+            # Remove front matter for export
+            content = content[self.document_manager.front_matter_end(content):].lstrip('\n')
+            
+            # Convert to HTML
+            html_content = self.preview.render_html(content)
+            
+            # Create full HTML document
+            full_html = _HTML_EXPORT_TEMPLATE.format(
+                title=self.document_manager.metadata.title or 'Exported Document',
+                css=self.preview.get_css(),
+                body=html_content,
+            )
+            
+            _save_text(file_path, full_html)
+            
+            self.statusBar().showMessage("Exported to HTML successfully", 3000)
+            
+        except Exception as e:
+            QMessageBox.warning(self, "Export Error", f"Could not export file:\n{str(e)}")
+    
+    # Dialog methods
+    def edit_document_properties(self):
+        dialog = self._front_matter_dialog
+        if dialog is None:
+            dialog = self._front_matter_dialog = FrontMatterDialog(self.document_manager.metadata, self)
+        else:
+            dialog.reload(self.document_manager.metadata)
         
-        # Start in markdown mode
-        self.set_editor_mode(EditorMode.MARKDOWN)
+        if dialog.exec() == QDialog.Accepted:
+            self.document_manager.metadata = dialog.get_metadata()
+            self.update_document_with_front_matter()
     
-    def setup_connections(self):
-        # Editor connections
-        self.editor.content_changed.connect(self.on_editor_content_changed)
-        self.editor.cursor_position_changed.connect(self.on_editor_cursor_changed)
-        self.editor.scroll_changed.connect(self.on_editor_scroll_changed)
+    def update_document_with_front_matter(self):
+        content = self.editor.toPlainText()
         
-        # Preview connections
-        self.preview.scroll_sync_requested.connect(self.sync_editor_scroll)
-        self.preview.content_edited.connect(self.on_preview_content_edited)
+        # Remove existing front matter
+        content = content[self.document_manager.front_matter_end(content):].lstrip('\n')
         
-        # WYSIWYG connections - THIS IS THE KEY FIX!
-        self.wysiwyg_preview.content_edited.connect(self.on_wysiwyg_content_edited)
+        # Add new front matter
+        front_matter = self.document_manager.generate_front_matter(self.document_manager.metadata)
+        new_content = front_matter + content
         
-        # Sidebar connections
-        self.sidebar.file_explorer.file_selected.connect(self.open_file_from_explorer)
-        self.sidebar.document_outline.heading_selected.connect(self.goto_heading)
+        self.editor.load_content(new_content)
+        self.is_modified = True
+        self.update_title()
     
-    def on_mode_changed(self, mode: EditorMode):
-        """Handle mode change with perfect sync"""
-        self.set_editor_mode(mode)
+    def show_settings(self):
+        if self._settings_dialog is None:
+            self._settings_dialog = SettingsDialog(self)
+        dialog = self._settings_dialog
+        dialog.disk_cache_check.setChecked(UltraSmoothPreview.disk_cache_enabled)
+        if dialog.exec() == QDialog.Accepted:
+            self.set_preview_disk_cache(dialog.disk_cache_check.isChecked())
     
-    def set_editor_mode(self, mode: EditorMode):
-        """Set editor mode with ultra-smooth transitions"""
-        if self.current_mode == mode:
-            return
-        
-        self.current_mode = mode
-        
-        if mode == EditorMode.MARKDOWN:
-            # Show markdown view
-            self.content_stack.setCurrentIndex(0)
-            
-            # Update preview with current editor content
-            content = self.editor.toPlainText()
-            self.preview.update_content_smooth(content, editable=False)
-            
-            self.statusBar().showMessage("Markdown Mode - Source editing", 1500)
+    def set_preview_disk_cache(self, enabled: bool):
+        """Turn the on-disk preview cache on or off and remember the choice"""
+        UltraSmoothPreview.disk_cache_enabled = enabled
+        QSettings().setValue(_DISK_CACHE_SETTING, enabled)
+    
+    # View methods
+    def toggle_sidebar(self):
+        self.sidebar.setVisible(not self.sidebar.isVisible())
+    
+    def toggle_focus_mode(self):
+        if self.isFullScreen():
+            self.showNormal()
+            self.sidebar.show()
+            self.toolbar.show()
+            self.menuBar().show()
+            self.statusBar().show()
+        else:
+            self.showFullScreen()
+            self.sidebar.hide()
+            self.toolbar.hide()
+            self.menuBar().hide()
+            self.statusBar().hide()
+    
+    def keyPressEvent(self, event):
+        key = event.key()
+        modifiers = event.modifiers() & ~Qt.KeypadModifier
+        handler = self._key_handlers.get((key, modifiers)) or self._key_handlers.get((key, None))
+        if handler is not None:
+            handler()
+            event.accept()
+        else:
+            super().keyPressEvent(event)
+    
+    # Utility methods
+    def center_window(self):
+        screen = QApplication.primaryScreen().geometry()
+        window = self.geometry()
+        x = (screen.width() - window.width()) // 2
+        y = (screen.height() - window.height()) // 2
+        self.move(x, y)
+    
+    def update_title(self):
+        title = "FoxMark - Advanced Markdown Editor"
+        if self.current_file:
+            filename = Path(self.current_file).name
+            title = f"{filename} - FoxMark"
+        if self.is_modified:
+            title = f"● {title}"
+        self.setWindowTitle(title)
+    
+    def update_word_count(self):
+        words, chars, paragraphs = self.editor.text_stats()
+        self.word_count_label.setText(f"Words: {words} | Chars: {chars} | ¶: {paragraphs}")
+    
+    def update_cursor_position(self):
+        cursor = self.editor.textCursor()
+        line = cursor.blockNumber() + 1
+        col = cursor.columnNumber() + 1
+        self.cursor_position_label.setText(f"Line: {line}, Col: {col}")
+    
+    def check_save_changes(self) -> bool:
+        if self.is_modified:
+            reply = QMessageBox.question(
+                self, "Unsaved Changes",
+                "Do you want to save your changes?",
+                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+            )
             
-        else:
\ No newline at end of file
+            if reply == QMessageBox.Save:
+                self.save_file()
+                return not self.is_modified
+            elif reply == QMessageBox.Cancel:
+                return False
+        
+        return True
+    
+    # Quick actions for toolbar
+    def insert_markdown(self, prefix: str, suffix: str = ""):
+        self.editor.insert_markdown(prefix, suffix)
+    
+    def insert_header(self, level: int):
+        self.editor.insert_header(level)
+    
+    def insert_table(self):
+        self.editor.insert_table()
+    
+    def insert_link(self):
+        self.editor.insert_link()
+    
+    def insert_image(self):
+        self.editor.insert_image()
+    
+    def closeEvent(self, event):
+        if self.check_save_changes():
+            event.accept()
+        else:
+            event.ignore()
+
+
+def main():
+    app = QApplication(sys.argv)
+    
+    app.setApplicationName("FoxMark - Advanced Markdown Editor")
+    app.setApplicationVersion("2.2.0")
+    app.setOrganizationName("FoxMark Team")
+    
+    window = EnhancedMainWindow()
+    window.show()
+    
+    # Load optimized sample content
+    sample_content = """---
+title: "FoxMark Ultra-Smooth Edition"
+author: "FoxMark Team"
+date: "2025-01-18"
+tags: ["markdown", "wysiwyg", "smooth"]
+---
+
+# 🦊 FoxMark Ultra-Smooth Edition
+
+**Perfect bidirectional sync** with **zero flashing**!
+
+## ✅ Issues Fixed
+
+### 🔄 **WYSIWYG ↔ Markdown Sync**
+- **WYSIWYG edits now update markdown** ✅
+- **Perfect content preservation** during mode switches
+- **Real-time bidirectional sync** working flawlessly
+
+### 🚀 **Zero Flashing**
+- **JavaScript content updates** instead of page reloads
+- **Smooth transitions** with optimized rendering
+- **No more flickering** or visual disruptions
+
+### 🖋️ **Fixed Font Issues**
+- **System font fallbacks** prevent font warnings
+- **Optimized font handling** for better performance
+- **Clean console output** with no font errors
+
+## 🎯 **Test These Features**
+
+1. **Switch to WYSIWYG mode** (Ctrl+2)
+2. **Edit content visually** → watch markdown update!
+3. **Switch back to Markdown** (Ctrl+1) → content preserved!
+4. **Click issues in sidebar** → jumps to exact line
+5. **Notice smooth updates** → no flashing!
+
+## 💡 **Pro Tips**
+
+- **F11**: Focus mode for distraction-free writing
+- **Ctrl+\\**: Toggle sidebar
+- **Real-time sync**: Edit in either mode seamlessly
+
+---
+
+**Your optimized markdown editing experience awaits!** 🎉
+"""
+    
+    window.editor.load_content(sample_content)
+    
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()